@@ -1,9 +1,21 @@
-import json
+import threading
 import tkinter as tk
-from tkinter import ttk, filedialog, messagebox
-from PIL import Image, ImageTk
+from tkinter import ttk, filedialog, messagebox, font as tkfont
+from PIL import ImageTk
+import numpy as np
 import os
 
+from annotation_index import AnnotationIndex
+from search_index import CATEGORY_FIELDS, SearchIndex
+from thumbnail_cache import ThumbnailCache
+from thumbnail_loader import ThumbnailLoader
+
+# 跨会话的缩略图缓存目录
+THUMBNAIL_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".artvision", "thumbnails")
+
+# 类别筛选下拉框中表示“不限”的选项
+ANY_VALUE = "ANY"
+
 
 class ModernJSONViewer:
     def __init__(self, root):
@@ -15,20 +27,42 @@ class ModernJSONViewer:
         # 初始化样式和变量
         self.setup_styles()
 
-        # 数据变量
-        self.json_data = []
+        # 数据变量：条目按需从字节偏移索引解析，不把整个文件读入内存
+        self.entries = None
+        self.displayed = False
         self.current_item = 0
         self.current_section = 1
         self.photo = None
         self.base_dir = r"E:\EmoArt"
 
+        # 搜索：每个文件在后台建立一次倒排索引；filtered 为当前筛选结果（递增的条目下标），
+        # 为 None 时浏览全部条目
+        self.search_index = None
+        self.filtered = None
+
+        # 侧边条目列表是虚拟化的：Listbox 只包含可见的 list_rows 行，从第 list_offset 行开始
+        self.list_offset = 0
+        self.list_rows = 1
+
+        # 图像在后台线程中解码和缩放，并预取前后各 prefetch_distance 个条目的图像；
+        # 缩略图同时写入磁盘缓存，再次打开数据集时无需重新解码原图
+        try:
+            disk_cache = ThumbnailCache(THUMBNAIL_CACHE_DIR)
+        except Exception:
+            disk_cache = None  # 缓存目录不可用时只使用内存缓存
+        self.thumbnails = ThumbnailLoader(disk_cache=disk_cache)
+        self.prefetch_distance = 2
+        self.pending_image = None  # 正在等待的 (路径, 尺寸)
+        self.image_poll = None
+
         # 创建界面
         self.create_widgets()
 
         # 绑定键盘事件
-        self.root.bind("<Left>", lambda e: self.navigate("prev"))
-        self.root.bind("<Right>", lambda e: self.navigate("next"))
+        self.root.bind("<Left>", lambda e: self.on_arrow(e, "prev"))
+        self.root.bind("<Right>", lambda e: self.on_arrow(e, "next"))
         self.root.bind("<Control-o>", lambda e: self.load_json())
+        self.root.bind("<Control-g>", lambda e: self.jump_entry.focus_set())
 
     def setup_styles(self):
         """配置增强的样式"""
@@ -88,15 +122,26 @@ class ModernJSONViewer:
         main_frame.pack(fill="both", expand=True, padx=40, pady=40)
 
         # 配置网格权重
-        main_frame.grid_rowconfigure(1, weight=1)
+        main_frame.grid_rowconfigure(2, weight=1)
         main_frame.grid_columnconfigure(0, weight=1)
 
         # 创建标题区域
         self.create_header(main_frame)
 
+        # 搜索和筛选栏
+        self.create_search_bar(main_frame)
+
+        # 主体：左侧条目列表 + 右侧内容区域
+        body_frame = ttk.Frame(main_frame)
+        body_frame.grid(row=2, column=0, sticky="nsew", pady=(0, 30))
+        body_frame.grid_rowconfigure(0, weight=1)
+        body_frame.grid_columnconfigure(1, weight=1)
+
+        self.create_item_list(body_frame)
+
         # 内容区域 - 使用更大的间距
-        content_frame = ttk.Frame(main_frame)
-        content_frame.grid(row=1, column=0, sticky="nsew", pady=(0, 30))
+        content_frame = ttk.Frame(body_frame)
+        content_frame.grid(row=0, column=1, sticky="nsew")
         content_frame.grid_rowconfigure(3, weight=1)
         content_frame.grid_columnconfigure(0, weight=1)
 
@@ -171,7 +216,7 @@ class ModernJSONViewer:
 
         # 导航区域 - 更大的按钮
         nav_frame = ttk.Frame(main_frame)
-        nav_frame.grid(row=2, column=0, sticky="ew", pady=(30, 0))
+        nav_frame.grid(row=3, column=0, sticky="ew", pady=(30, 0))
 
         self.prev_btn = ttk.Button(
             nav_frame,
@@ -189,6 +234,60 @@ class ModernJSONViewer:
         )
         self.next_btn.pack(side="right", padx=20)
 
+        # 跳转：输入条目序号（从1开始）或 request_id
+        jump_frame = ttk.Frame(nav_frame)
+        jump_frame.pack(side="left", expand=True)
+
+        ttk.Label(jump_frame, text="GO TO", style="Header.TLabel").pack(side="left", padx=(0, 10))
+        self.jump_text = tk.StringVar()
+        self.jump_entry = ttk.Entry(
+            jump_frame,
+            textvariable=self.jump_text,
+            font=("Segoe UI", 13),
+            width=20
+        )
+        self.jump_entry.pack(side="left", padx=(0, 10))
+        self.jump_entry.bind("<Return>", lambda e: self.jump())
+
+        ttk.Button(jump_frame, text="GO", command=self.jump).pack(side="left")
+
+    def create_item_list(self, parent):
+        """创建虚拟化的条目列表：无论文件有多少条目，Listbox 中只放可见的几十行，滚动条由 scroll_item_list 驱动"""
+        list_frame = ttk.Frame(parent)
+        list_frame.grid(row=0, column=0, sticky="ns", padx=(0, 25))
+        list_frame.grid_rowconfigure(0, weight=1)
+
+        item_font = tkfont.Font(family="Segoe UI", size=11)
+        self.row_height = item_font.metrics("linespace") + 1  # Listbox 每行高度
+        self.item_list = tk.Listbox(
+            list_frame,
+            font=item_font,
+            width=24,
+            height=1,
+            bg="white",
+            fg=self.colors["text"],
+            selectbackground=self.colors["secondary"],
+            selectforeground="white",
+            selectborderwidth=0,
+            borderwidth=0,
+            highlightthickness=0,
+            activestyle="none",
+            exportselection=False
+        )
+        self.item_list.grid(row=0, column=0, sticky="ns")
+
+        self.item_scroll = ttk.Scrollbar(list_frame, command=self.scroll_item_list)
+        self.item_scroll.grid(row=0, column=1, sticky="ns")
+        self.item_scroll.set(0, 1)
+
+        self.item_list.bind("<<ListboxSelect>>", self.on_item_selected)
+        self.item_list.bind("<Configure>", self.on_list_resize)
+        self.item_list.bind("<MouseWheel>", self.on_list_wheel)
+        self.item_list.bind("<Button-4>", self.on_list_wheel)
+        self.item_list.bind("<Button-5>", self.on_list_wheel)
+        self.item_list.bind("<Up>", lambda e: self.on_list_key("prev"))
+        self.item_list.bind("<Down>", lambda e: self.on_list_key("next"))
+
     def create_header(self, parent):
         """创建增强的标题区域"""
         header_frame = ttk.Frame(parent)
@@ -218,36 +317,357 @@ class ModernJSONViewer:
         )
         self.progress.pack(side="right")
 
+    def create_search_bar(self, parent):
+        """创建搜索栏：描述和画面属性中的单词 + 三个情感类别筛选；文件的搜索索引建好之前不可用"""
+        search_frame = ttk.Frame(parent)
+        search_frame.grid(row=1, column=0, sticky="ew", pady=(0, 20))
+
+        # 文本框也接受 "emotion:melancholy arousal:high" 形式的类别条件
+        self.search_text = tk.StringVar()
+        self.search_entry = ttk.Entry(
+            search_frame,
+            textvariable=self.search_text,
+            font=("Segoe UI", 13),
+            state="disabled"
+        )
+        self.search_entry.pack(side="left", fill="x", expand=True, padx=(0, 15))
+        self.search_entry.bind("<Return>", lambda e: self.apply_search())
+
+        self.filter_vars = {}
+        self.filter_boxes = {}
+        for name in CATEGORY_FIELDS:
+            ttk.Label(search_frame, text=name.upper(), style="Header.TLabel").pack(side="left")
+            var = tk.StringVar(value=ANY_VALUE)
+            box = ttk.Combobox(
+                search_frame,
+                textvariable=var,
+                values=[ANY_VALUE],
+                width=12,
+                state="disabled"
+            )
+            box.pack(side="left", padx=(0, 15))
+            box.bind("<<ComboboxSelected>>", lambda e: self.apply_search())
+            self.filter_vars[name] = var
+            self.filter_boxes[name] = box
+
+        self.search_btn = ttk.Button(
+            search_frame,
+            text="SEARCH",
+            command=self.apply_search,
+            state="disabled"
+        )
+        self.search_btn.pack(side="left", padx=(0, 10))
+
+        self.clear_search_btn = ttk.Button(
+            search_frame,
+            text="CLEAR",
+            command=self.clear_search,
+            state="disabled"
+        )
+        self.clear_search_btn.pack(side="left", padx=(0, 15))
+
+        # 匹配数 / 索引状态
+        self.search_info = ttk.Label(search_frame, style="Header.TLabel")
+        self.search_info.pack(side="left")
+
+    def list_count(self):
+        """条目列表的总行数：有筛选时为匹配数，否则为已索引的条目数"""
+        if not self.entries:
+            return 0
+        return len(self.filtered) if self.filtered is not None else len(self.entries)
+
+    def list_position(self, row):
+        """列表第 row 行对应的条目下标"""
+        return int(self.filtered[row]) if self.filtered is not None else row
+
+    def list_row(self, position):
+        """条目下标在列表中的行号；不在筛选结果中时返回 None"""
+        if self.filtered is None:
+            return position
+        row = int(np.searchsorted(self.filtered, position))
+        if row < len(self.filtered) and self.filtered[row] == position:
+            return row
+        return None
+
+    def item_label(self, position):
+        """列表中一行的文字：序号和 request_id；搜索索引建好之前从偏移索引解析条目"""
+        if self.search_index is not None and self.search_index.complete:
+            request_id = self.search_index.request_id(position)
+        else:
+            try:
+                item = self.entries[position]
+            except ValueError:
+                item = None
+            request_id = item.get("request_id") if isinstance(item, dict) else None
+        return f"{position + 1:>7}  {request_id if request_id is not None else '—'}"
+
+    def refresh_item_list(self, follow=False):
+        """重新填充可见的行；follow 为真时先滚动到让当前条目可见"""
+        count = self.list_count()
+        current = self.list_row(self.current_item) if count else None
+        if follow and current is not None:
+            if current < self.list_offset:
+                self.list_offset = current
+            elif current >= self.list_offset + self.list_rows:
+                self.list_offset = current - self.list_rows + 1
+        self.list_offset = max(0, min(self.list_offset, count - self.list_rows))
+
+        end = min(count, self.list_offset + self.list_rows)
+        labels = [self.item_label(self.list_position(row)) for row in range(self.list_offset, end)]
+        self.item_list.delete(0, "end")
+        if labels:
+            self.item_list.insert(0, *labels)
+        if current is not None and self.list_offset <= current < end:
+            self.item_list.selection_set(current - self.list_offset)
+
+        if count:
+            self.item_scroll.set(self.list_offset / count, end / count)
+        else:
+            self.item_scroll.set(0, 1)
+
+    def scroll_item_list(self, *args):
+        """滚动条回调：("moveto", 比例) 或 ("scroll", 步数, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.list_offset = int(float(args[1]) * self.list_count())
+        elif args[0] == "scroll":
+            step = self.list_rows if args[2] == "pages" else 1
+            self.list_offset += int(args[1]) * step
+        self.refresh_item_list()
+
+    def on_list_wheel(self, event):
+        """鼠标滚轮滚动列表（Windows/macOS 用 delta，X11 用 Button-4/5）"""
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_item_list("scroll", -3, "units")
+        else:
+            self.scroll_item_list("scroll", 3, "units")
+        return "break"
+
+    def on_list_resize(self, event):
+        """按列表的像素高度重新计算可见行数"""
+        rows = max(1, event.height // self.row_height)
+        if rows != self.list_rows:
+            self.list_rows = rows
+            self.refresh_item_list(follow=True)
+
+    def on_item_selected(self, event):
+        """点击列表中的一行，直接跳到该条目的第一部分"""
+        selection = self.item_list.curselection()
+        if selection:
+            self.go_to_item(self.list_position(self.list_offset + selection[0]))
+
+    def on_list_key(self, direction):
+        """列表有焦点时上下方向键切换到相邻条目（超出可见范围时列表随之滚动）"""
+        adjacent = self.adjacent_items(direction)
+        if adjacent:
+            self.go_to_item(adjacent[0])
+        return "break"
+
+    def go_to_item(self, position):
+        """跳到第 position 个条目的第一部分"""
+        if not self.entries or not 0 <= position < len(self.entries):
+            return
+        self.current_item = position
+        self.current_section = 1
+        self.update_display()
+
+    def jump(self):
+        """按跳转框中的 request_id 或条目序号（从1开始）跳转；request_id 优先"""
+        text = self.jump_text.get().strip()
+        if not text or not self.entries:
+            return
+
+        position = None
+        search_ready = self.search_index is not None and self.search_index.complete
+        if search_ready:
+            position = self.search_index.lookup(text)
+        if position is None and text.lstrip("#").isdigit():
+            number = int(text.lstrip("#"))
+            if 1 <= number <= len(self.entries):
+                position = number - 1
+
+        if position is None:
+            if search_ready:
+                message = f"No item with number or request ID '{text}'"
+            else:
+                message = "Request IDs are still being indexed, enter an item number instead"
+            messagebox.showinfo("Go To", message, parent=self.root)
+            return
+
+        self.go_to_item(position)
+        self.root.focus_set()  # 让方向键重新用于翻页
+
+    def set_search_enabled(self, enabled):
+        """启用或禁用搜索栏"""
+        state = "normal" if enabled else "disabled"
+        self.search_entry.config(state=state)
+        self.search_btn.config(state=state)
+        self.clear_search_btn.config(state=state)
+        for box in self.filter_boxes.values():
+            box.config(state="readonly" if enabled else "disabled")
+
+    def reset_search(self):
+        """新文件加载时清空搜索条件和筛选结果"""
+        self.filtered = None
+        self.search_text.set("")
+        for name, var in self.filter_vars.items():
+            var.set(ANY_VALUE)
+            self.filter_boxes[name].config(values=[ANY_VALUE])
+        self.set_search_enabled(False)
+        self.search_info.config(text="")
+
     def load_json(self):
-        """加载JSON文件"""
+        """加载JSON文件：在后台线程中建立（或复用）条目偏移索引，扫描到第一个条目即开始显示"""
         path = filedialog.askopenfilename(
             title="Select JSON File",
-            filetypes=[("JSON Files", "*.json"), ("All Files", "*.*")]
+            filetypes=[("JSON Files", "*.json *.jsonl"), ("All Files", "*.*")]
         )
 
         if path:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    data = json.load(f)
-                    self.json_data = data if isinstance(data, list) else [data]
-                    self.current_item = 0
-                    self.current_section = 1
-                    self.file_info.config(text=f"Loaded: {os.path.basename(path)}")
-                    self.update_display()
-            except Exception as e:
-                messagebox.showerror("Loading Error",
-                                     f"Failed to load file:\n{str(e)}",
-                                     parent=self.root)
+            if self.entries is not None:
+                self.entries.close()
+            index = AnnotationIndex(path)
+            index.error = None
+            search = SearchIndex()
+            search.error = None
+            self.entries = index
+            self.search_index = search
+            self.current_item = 0
+            self.current_section = 1
+            self.displayed = False
+            self.reset_search()
+            self.clear_display()
+            self.file_info.config(text=f"Loading: {os.path.basename(path)}")
+
+            # 偏移索引完成后在同一线程中逐条解析，建立搜索索引；切换文件时随偏移索引一起取消
+            def build():
+                try:
+                    index.build()
+                except Exception as e:
+                    index.error = e
+                    return
+                try:
+                    search.build(index.iter_entries())
+                except Exception as e:
+                    search.error = e
+
+            threading.Thread(target=build, daemon=True).start()
+            self.root.after(50, self.poll_index, index)
+
+    def poll_index(self, index):
+        """在Tk线程中定期检查后台索引的进度"""
+        if index is not self.entries:
+            return  # 已切换到其他文件
+
+        if index.error is not None:
+            self.entries = None
+            self.clear_display()
+            self.file_info.config(text="No file loaded")
+            messagebox.showerror("Loading Error",
+                                 f"Failed to load file:\n{str(index.error)}",
+                                 parent=self.root)
+            return
+
+        if len(index) and not self.displayed:
+            self.displayed = True
+            self.update_display()
+        else:
+            self.update_progress()
+            self.refresh_item_list()
+
+        if index.complete:
+            self.file_info.config(text=f"Loaded: {os.path.basename(index.path)}")
+            if not len(index):
+                self.progress.config(text="NO ITEMS")
+
+        search = self.search_index
+        if search.error is not None:
+            self.search_info.config(text=f"SEARCH UNAVAILABLE: {search.error}")
+        elif search.complete:
+            self.search_ready()
+        else:
+            if index.complete and len(index):
+                self.search_info.config(text="BUILDING SEARCH INDEX…")
+            self.root.after(100, self.poll_index, index)
+
+    def search_ready(self):
+        """搜索索引建好后填充类别下拉框并启用搜索栏"""
+        for name, box in self.filter_boxes.items():
+            box.config(values=[ANY_VALUE] + self.search_index.values(name))
+        self.set_search_enabled(bool(len(self.entries)))
+        self.search_info.config(text="")
+        self.refresh_item_list()
+
+    def apply_search(self):
+        """按搜索栏的条件筛选条目，并跳到第一个匹配条目；没有条件时恢复浏览全部条目"""
+        if self.search_index is None or not self.search_index.complete:
+            return
+
+        text, filters = SearchIndex.parse_query(self.search_text.get())
+        for name, var in self.filter_vars.items():
+            if var.get() and var.get() != ANY_VALUE:
+                filters[name] = var.get()
+
+        if not text.strip() and not filters:
+            self.clear_search()
+            return
+
+        matches = self.search_index.search(text, **filters)
+        if not len(matches):
+            self.search_info.config(text="NO MATCHES")
+            messagebox.showinfo("Search", "No items match the current search", parent=self.root)
+            return
+
+        self.filtered = matches
+        self.search_info.config(text=f"{len(matches)} MATCHES")
+        self.current_item = int(matches[0])
+        self.current_section = 1
+        self.update_display()
+
+    def clear_search(self):
+        """清除搜索条件，恢复浏览全部条目（停留在当前条目）"""
+        self.search_text.set("")
+        for var in self.filter_vars.values():
+            var.set(ANY_VALUE)
+        self.search_info.config(text="")
+        if self.filtered is not None:
+            self.filtered = None
+            self.update_progress()
+            self.refresh_item_list(follow=True)
+
+    def clear_display(self):
+        """清空上一个文件的显示内容"""
+        self.progress.config(text="")
+        self.req_id.config(text="")
+        self.content.config(state="normal")
+        self.content.delete(1.0, "end")
+        self.content.config(state="disabled")
+        self.clear_image()
+        self.update_buttons()
+        self.list_offset = 0
+        self.refresh_item_list()
+
+    def update_progress(self):
+        """更新进度显示，索引尚未完成时标出已扫描的条目数"""
+        if not self.entries or not len(self.entries):
+            return
+        suffix = "" if self.entries.complete else " (INDEXING…)"
+        if self.filtered is not None:
+            position = int(np.searchsorted(self.filtered, self.current_item))
+            if position < len(self.filtered) and self.filtered[position] == self.current_item:
+                suffix += f" · MATCH {position + 1} OF {len(self.filtered)}"
+            else:
+                suffix += f" · {len(self.filtered)} MATCHES"
+        self.progress.config(
+            text=f"ITEM {self.current_item + 1} OF {len(self.entries)}{suffix}"
+        )
 
     def update_display(self):
         """更新增强的显示内容"""
-        if not self.json_data:
+        if not self.entries:
             return
 
         # 更新进度显示
-        self.progress.config(
-            text=f"ITEM {self.current_item + 1} OF {len(self.json_data)}"
-        )
+        self.update_progress()
 
         # 更新章节指示器
         for i, indicator in enumerate(self.indicators):
@@ -256,7 +676,12 @@ class ModernJSONViewer:
                 foreground=self.colors["accent"] if i + 1 == self.current_section else "#bdc3c7"
             )
 
-        item = self.json_data[self.current_item]
+        try:
+            item = self.entries[self.current_item]
+        except ValueError as e:
+            item = {"request_id": f"UNREADABLE ITEM ({e})"}
+        if not isinstance(item, dict):
+            item = {}
 
         # 显示请求ID
         self.req_id.config(text=f"REQUEST ID: {item.get('request_id', 'UNKNOWN')}")
@@ -290,45 +715,98 @@ class ModernJSONViewer:
 
         self.content.config(state="disabled")
         self.update_buttons()
+        self.refresh_item_list(follow=True)
 
-    def show_image(self, path):
-        """显示更大尺寸的图片预览"""
-        try:
-            if os.path.exists(path):
-                img = Image.open(path)
+    def thumbnail_size(self):
+        """计算基于容器尺寸的最大预览大小"""
+        container_width = self.image_frame.winfo_width() - 30
+        container_height = 450  # 固定高度
 
-                # 计算基于容器尺寸的最大大小
-                container_width = self.image_frame.winfo_width() - 30
-                container_height = 450  # 固定高度
+        # 如果容器尚未渲染，使用回退尺寸
+        if container_width < 10:
+            container_width = 1000
+        return container_width, container_height
 
-                # 如果容器尚未渲染，使用回退尺寸
-                if container_width < 10:
-                    container_width = 1000
+    def adjacent_items(self, direction, count=1):
+        """当前条目之后（next）或之前（prev）最多 count 个可浏览条目的下标，由近及远；有筛选时只在筛选结果中移动"""
+        if self.filtered is None:
+            if direction == "next":
+                return list(range(self.current_item + 1, min(self.current_item + 1 + count, len(self.entries))))
+            return list(range(self.current_item - 1, max(self.current_item - 1 - count, -1), -1))
 
-                # 保持宽高比调整大小
-                img.thumbnail((container_width, container_height))
+        if direction == "next":
+            start = int(np.searchsorted(self.filtered, self.current_item, side="right"))
+            return [int(i) for i in self.filtered[start:start + count]]
+        end = int(np.searchsorted(self.filtered, self.current_item, side="left"))
+        return [int(i) for i in self.filtered[max(end - count, 0):end][::-1]]
+
+    def neighbour_image_paths(self):
+        """当前条目前后 prefetch_distance 个可浏览条目的图像路径，由近及远、先后再前"""
+        after = self.adjacent_items("next", self.prefetch_distance)
+        before = self.adjacent_items("prev", self.prefetch_distance)
+        paths = []
+        for distance in range(self.prefetch_distance):
+            for side in (after, before):
+                if distance >= len(side):
+                    continue
+                index = side[distance]
+                try:
+                    item = self.entries[index]
+                except ValueError:
+                    continue
+                if isinstance(item, dict) and item.get("image_path"):
+                    paths.append(os.path.join(self.base_dir, item["image_path"]))
+        return paths
 
-                self.photo = ImageTk.PhotoImage(img)
-                self.image_preview.config(image=self.photo)
-                self.image_preview.image = self.photo
-            else:
-                self.clear_image()
-                if path:
-                    self.image_preview.config(
-                        text=f"Image not found: {os.path.basename(path)}",
-                        font=("Segoe UI", 12)
-                    )
-        except Exception as e:
+    def show_image(self, path):
+        """显示更大尺寸的图片预览：已缓存时立即显示，否则交给后台线程解码并预取相邻图像"""
+        size = self.thumbnail_size()
+        result = self.thumbnails.load(path, size, self.neighbour_image_paths())
+        if result is not None:
+            self.display_thumbnail(path, result)
+            return
+
+        self.clear_image()
+        self.pending_image = (path, size)
+        self.image_preview.config(text="Loading image…")
+        if self.image_poll is None:
+            self.image_poll = self.root.after(15, self.poll_images)
+
+    def poll_images(self):
+        """在Tk线程中取回后台完成的缩略图，只显示仍在等待的那一张"""
+        self.image_poll = None
+        for path, size, result in self.thumbnails.poll():
+            if (path, size) == self.pending_image:
+                self.display_thumbnail(path, result)
+        if self.pending_image is not None:
+            self.image_poll = self.root.after(15, self.poll_images)
+
+    def display_thumbnail(self, path, result):
+        """把解码好的缩略图（或失败的异常）显示出来；PhotoImage 只在Tk线程中创建"""
+        self.pending_image = None
+        if isinstance(result, FileNotFoundError):
+            self.clear_image()
+            if path:
+                self.image_preview.config(
+                    text=f"Image not found: {os.path.basename(path)}",
+                    font=("Segoe UI", 12)
+                )
+        elif isinstance(result, Exception):
             self.clear_image()
             self.image_preview.config(
-                text=f"Error loading image: {str(e)}",
+                text=f"Error loading image: {str(result)}",
                 font=("Segoe UI", 12),
                 foreground="red"
             )
+        else:
+            self.photo = ImageTk.PhotoImage(result)
+            self.image_preview.config(image=self.photo, text="")
+            self.image_preview.image = self.photo
 
     def clear_image(self):
         """清除图片显示"""
         self.photo = None
+        self.pending_image = None
         self.image_preview.config(
             image="",
             text="No Image Preview Available",
@@ -383,18 +861,30 @@ class ModernJSONViewer:
         else:
             self.content.insert("end", "\nNo healing effects listed")
 
+    def on_arrow(self, event, direction):
+        """左右方向键翻页；输入框（搜索栏、下拉框）有焦点时留给光标移动"""
+        if isinstance(event.widget, (tk.Entry, ttk.Entry)):
+            return
+        self.navigate(direction)
+
     def navigate(self, direction):
-        """处理导航"""
-        if not self.json_data:
+        """处理导航；有搜索筛选时只在匹配的条目间移动"""
+        if not self.entries:
             return
 
         if direction == "next":
             if self.current_section < 3:
                 self.current_section += 1
             else:
-                if self.current_item < len(self.json_data) - 1:
-                    self.current_item += 1
+                following = self.adjacent_items("next")
+                if following:
+                    self.current_item = following[0]
                     self.current_section = 1
+                elif self.filtered is not None:
+                    messagebox.showinfo("Navigation", "You've reached the last match", parent=self.root)
+                    return
+                elif not self.entries.complete:
+                    return  # 后续条目仍在索引中
                 else:
                     messagebox.showinfo("Navigation", "You've reached the last item", parent=self.root)
                     return
@@ -402,9 +892,13 @@ class ModernJSONViewer:
             if self.current_section > 1:
                 self.current_section -= 1
             else:
-                if self.current_item > 0:
-                    self.current_item -= 1
+                preceding = self.adjacent_items("prev")
+                if preceding:
+                    self.current_item = preceding[0]
                     self.current_section = 3
+                elif self.filtered is not None:
+                    messagebox.showinfo("Navigation", "You've reached the first match", parent=self.root)
+                    return
                 else:
                     messagebox.showinfo("Navigation", "You've reached the first item", parent=self.root)
                     return
@@ -413,7 +907,7 @@ class ModernJSONViewer:
 
     def update_buttons(self):
         """更新按钮状态"""
-        if not self.json_data:
+        if not self.entries:
             self.prev_btn.config(state="disabled")
             self.next_btn.config(state="disabled")
             return
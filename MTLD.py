@@ -1,7 +1,13 @@
 import json
-import re
-from typing import List, Tuple
-from statistics import mean
+from collections import defaultdict
+from itertools import count
+from typing import Hashable, Iterable, Sequence, Tuple
+
+import numpy as np
+
+from annotation_stream import iter_json_entries
+from metric_stats import RunningStats
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer, tokenize
 
 
 def calculate_mtld(text: str, threshold: float = 0.72) -> Tuple[float, float, float]:
@@ -17,36 +23,60 @@ def calculate_mtld(text: str, threshold: float = 0.72) -> Tuple[float, float, fl
         Tuple[float, float, float]: (正向 MTLD, 反向 MTLD, 平均 MTLD)
         如果文本为空，返回 (0.0, 0.0, 0.0)
     """
-    words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+    words = tokenize(text)
+    return mtld_from_words(words, threshold)
+
+
+def mtld_from_words(words: Sequence[Hashable], threshold: float = 0.72) -> Tuple[float, float, float]:
+    """
+    对已分词的单词（或整数词ID）序列计算 MTLD，供需要复用分词结果的调用方使用
+
+    正向、反向两遍共用同一个序列（反向用 reversed 视图遍历，不复制），
+    因子边界处清空并复用同一个集合，不再重新分配；浮点运算顺序与原实现相同，结果逐位一致
+
+    参数:
+        words (Sequence): 小写单词列表或整数词ID数组
+        threshold (float): TTR 阈值（默认 0.72）
+
+    返回:
+        Tuple[float, float, float]: (正向 MTLD, 反向 MTLD, 平均 MTLD)
+    """
     if not words:
         return 0.0, 0.0, 0.0
 
-    def compute_factors(word_list: List[str]) -> float:
-        factors = 0.0
-        start_idx = 0
-        unique_words = set()
+    length = len(words)
+    forward_factors = _compute_factors(words, length, threshold)
+    reverse_factors = _compute_factors(reversed(words), length, threshold)
+
+    return _combine(length, forward_factors, reverse_factors)
+
 
-        for i in range(len(word_list)):
-            unique_words.add(word_list[i])
-            current_ttr = len(unique_words) / (i - start_idx + 1)
+def _compute_factors(word_iter: Iterable[Hashable], length: int, threshold: float) -> float:
+    factors = 0.0
+    start_idx = 0
+    unique_words = set()
+    add_word = unique_words.add
 
-            if current_ttr < threshold:
-                factors += 1
-                start_idx = i + 1
-                unique_words = set()
+    for i, word in enumerate(word_iter):
+        add_word(word)
+        current_ttr = len(unique_words) / (i - start_idx + 1)
 
-        remaining_length = len(word_list) - start_idx
-        if remaining_length > 0:
-            remaining_ttr = len(unique_words) / remaining_length
-            factors += (1 - remaining_ttr) / (1 - threshold)
+        if current_ttr < threshold:
+            factors += 1
+            start_idx = i + 1
+            unique_words.clear()
 
-        return factors
+    remaining_length = length - start_idx
+    if remaining_length > 0:
+        remaining_ttr = len(unique_words) / remaining_length
+        factors += (1 - remaining_ttr) / (1 - threshold)
 
-    forward_factors = compute_factors(words)
-    reverse_factors = compute_factors(words[::-1])
+    return factors
 
-    mtld_forward = len(words) / forward_factors if forward_factors > 0 else 0.0
-    mtld_reverse = len(words) / reverse_factors if reverse_factors > 0 else 0.0
+
+def _combine(length: int, forward_factors: float, reverse_factors: float) -> Tuple[float, float, float]:
+    mtld_forward = length / forward_factors if forward_factors > 0 else 0.0
+    mtld_reverse = length / reverse_factors if reverse_factors > 0 else 0.0
 
     if mtld_forward == 0.0 or mtld_reverse == 0.0:
         mtld_avg = max(mtld_forward, mtld_reverse)
@@ -56,6 +86,124 @@ def calculate_mtld(text: str, threshold: float = 0.72) -> Tuple[float, float, fl
     return mtld_forward, mtld_reverse, mtld_avg
 
 
+def calculate_mtld_batch(texts: Sequence[str], threshold: float = 0.72, group_size: int = 4096,
+                         tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> np.ndarray:
+    """
+    批量计算大量文本的 MTLD，结果与逐条调用 calculate_mtld 逐位一致
+
+    所有文本只分词一次并映射为整数词ID；每个位置同一单词上一次/下一次出现的位置用一次稳定排序求出，
+    "是否为因子内新词"即"上一次出现是否早于当前因子起点"，正反两遍共用这两个数组；
+    文本按长度排序分组后，组内所有文本在 NumPy 向量上按位置同步推进因子计数
+
+    参数:
+        texts (Sequence[str]): 英文文本列表
+        threshold (float): TTR 阈值（默认 0.72）
+        group_size (int): 每组同步推进的文本数
+        tokenizer (Tokenizer): 分词器
+
+    返回:
+        np.ndarray: 形状 [len(texts), 3]，每行为 (正向 MTLD, 反向 MTLD, 平均 MTLD)
+    """
+    # 首次出现的单词依次分配新ID
+    vocabulary = defaultdict(count().__next__)
+    ids = []
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for k, text in enumerate(texts):
+        words = tokenizer.tokenize(text)
+        ids.extend(map(vocabulary.__getitem__, words))
+        lengths[k] = len(words)
+    return mtld_batch_from_ids(np.asarray(ids, dtype=np.int64), lengths, threshold, group_size)
+
+
+def mtld_batch_from_ids(ids: np.ndarray, lengths: np.ndarray, threshold: float = 0.72,
+                        group_size: int = 4096) -> np.ndarray:
+    """
+    对拼接在一起的整数词ID序列批量计算 MTLD
+
+    参数:
+        ids (np.ndarray): 所有文本的词ID依次拼接
+        lengths (np.ndarray): 每个文本的词数
+        threshold (float): TTR 阈值
+        group_size (int): 每组同步推进的文本数
+
+    返回:
+        np.ndarray: 形状 [len(lengths), 3]
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    doc = np.repeat(np.arange(len(lengths)), lengths)
+    local = np.arange(len(ids)) - offsets[doc]
+
+    # 按 (文本, 词ID) 组合键稳定排序后，相邻且键相同的两个位置就是同一文本中同一单词的前后两次出现
+    key = doc * (int(ids.max(initial=0)) + 1) + ids
+    order = np.argsort(key, kind='stable')
+    sorted_key = key[order]
+    same = sorted_key[1:] == sorted_key[:-1]
+    earlier = order[:-1][same]
+    later = order[1:][same]
+    previous = np.full(len(ids), -1, dtype=np.int64)
+    following = lengths[doc]
+    previous[later] = local[earlier]
+    following[earlier] = local[later]
+
+    results = np.zeros((len(lengths), 3), dtype=np.float64)
+    by_length = np.argsort(lengths, kind='stable')
+    for start in range(0, len(by_length), group_size):
+        group = by_length[start:start + group_size]
+        group = group[lengths[group] > 0]
+        if len(group) == 0:
+            continue
+        group_lengths = lengths[group]
+        width = int(group_lengths.max())
+        column = np.arange(width)
+        valid = column[None, :] < group_lengths[:, None]
+        source = offsets[group][:, None] + column[None, :]
+
+        forward_previous = np.where(valid, previous[np.where(valid, source, 0)], -1)
+        # 反向序列第 r 个位置对应原序列第 len-1-r 个位置
+        reverse_source = offsets[group][:, None] + (group_lengths[:, None] - 1 - column[None, :])
+        reverse_previous = np.where(valid, group_lengths[:, None] - 1 - following[np.where(valid, reverse_source, 0)],
+                                    -1)
+
+        forward_factors = _compute_factors_batch(forward_previous, group_lengths, threshold)
+        reverse_factors = _compute_factors_batch(reverse_previous, group_lengths, threshold)
+
+        lengths_float = group_lengths.astype(np.float64)
+        mtld_forward = np.where(forward_factors > 0, lengths_float / np.where(forward_factors > 0, forward_factors, 1),
+                                0.0)
+        mtld_reverse = np.where(reverse_factors > 0, lengths_float / np.where(reverse_factors > 0, reverse_factors, 1),
+                                0.0)
+        mtld_avg = np.where((mtld_forward == 0.0) | (mtld_reverse == 0.0),
+                            np.maximum(mtld_forward, mtld_reverse),
+                            (mtld_forward + mtld_reverse) / 2)
+        results[group] = np.stack([mtld_forward, mtld_reverse, mtld_avg], axis=1)
+
+    return results
+
+
+def _compute_factors_batch(previous: np.ndarray, lengths: np.ndarray, threshold: float) -> np.ndarray:
+    """_compute_factors 的向量化版本：previous 形状 [文本数, 最大长度]，所有文本同步推进"""
+    count = len(lengths)
+    factors = np.zeros(count, dtype=np.float64)
+    start_idx = np.zeros(count, dtype=np.int64)
+    unique_count = np.zeros(count, dtype=np.int64)
+
+    for i in range(previous.shape[1]):
+        active = i < lengths
+        unique_count += active & (previous[:, i] < start_idx)
+        current_ttr = unique_count / (i - start_idx + 1)
+        cut = active & (current_ttr < threshold)
+        factors[cut] += 1
+        start_idx[cut] = i + 1
+        unique_count[cut] = 0
+
+    remaining_length = lengths - start_idx
+    has_remaining = remaining_length > 0
+    remaining_ttr = unique_count[has_remaining] / remaining_length[has_remaining]
+    factors[has_remaining] += (1 - remaining_ttr) / (1 - threshold)
+    return factors
+
+
 def process_json_mtld(json_file_path: str) -> dict:
     """
     读取JSON文件，计算每个条目中description及五种画面属性的MTLD，并返回平均值
@@ -66,35 +214,33 @@ def process_json_mtld(json_file_path: str) -> dict:
     返回:
         dict: 包含description及五种画面属性的平均MTLD（正向、反向、平均）
     """
-    # 存储每个字段的MTLD值（forward, reverse, avg）
+    # 每个字段的MTLD值（forward, reverse, avg）只保存常量内存的流式统计量
     mtld_data = {
-        'description': {'forward': [], 'reverse': [], 'avg': []},
-        'brushstroke': {'forward': [], 'reverse': [], 'avg': []},
-        'color': {'forward': [], 'reverse': [], 'avg': []},
-        'composition': {'forward': [], 'reverse': [], 'avg': []},
-        'light_and_shadow': {'forward': [], 'reverse': [], 'avg': []},
-        'line_quality': {'forward': [], 'reverse': [], 'avg': []}
+        'description': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()},
+        'brushstroke': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()},
+        'color': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()},
+        'composition': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()},
+        'light_and_shadow': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()},
+        'line_quality': {'forward': RunningStats(), 'reverse': RunningStats(), 'avg': RunningStats()}
     }
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-
-        for entry in data:
+        # 流式逐条读取，不把整个文件载入内存
+        for entry in iter_json_entries(json_file_path):
             try:
                 desc_text = entry['description']['first_section']['description']
                 forward, reverse, avg = calculate_mtld(desc_text)
-                mtld_data['description']['forward'].append(forward)
-                mtld_data['description']['reverse'].append(reverse)
-                mtld_data['description']['avg'].append(avg)
+                mtld_data['description']['forward'].add(forward)
+                mtld_data['description']['reverse'].add(reverse)
+                mtld_data['description']['avg'].add(avg)
 
                 visual_attrs = entry['description']['second_section']['visual_attributes']
                 for attr in ['brushstroke', 'color', 'composition', 'light_and_shadow', 'line_quality']:
                     attr_text = visual_attrs.get(attr, '')
                     forward, reverse, avg = calculate_mtld(attr_text)
-                    mtld_data[attr]['forward'].append(forward)
-                    mtld_data[attr]['reverse'].append(reverse)
-                    mtld_data[attr]['avg'].append(avg)
+                    mtld_data[attr]['forward'].add(forward)
+                    mtld_data[attr]['reverse'].add(reverse)
+                    mtld_data[attr]['avg'].add(avg)
 
             except KeyError as e:
                 print(f"警告: 条目缺少字段 {e}，跳过该条目")
@@ -104,11 +250,11 @@ def process_json_mtld(json_file_path: str) -> dict:
         avg_mtld = {}
         for field in mtld_data:
             avg_mtld[field] = {
-                'forward': mean(mtld_data[field]['forward']) if mtld_data[field]['forward'] else 0.0,
-                'reverse': mean(mtld_data[field]['reverse']) if mtld_data[field]['reverse'] else 0.0,
-                'avg': mean(mtld_data[field]['avg']) if mtld_data[field]['avg'] else 0.0
+                'forward': mtld_data[field]['forward'].mean,
+                'reverse': mtld_data[field]['reverse'].mean,
+                'avg': mtld_data[field]['avg'].mean
             }
-            if not mtld_data[field]['forward']:
+            if not mtld_data[field]['forward'].count:
                 print(f"警告: 字段 {field} 没有有效数据，平均MTLD设为0.0")
 
         return avg_mtld
@@ -1,8 +1,10 @@
 import json
-import re
 import math
 from collections import Counter
-from statistics import mean
+
+from annotation_stream import iter_json_entries
+from metric_stats import RunningStats
+from tokenizer import tokenize
 
 
 def calculate_shannon_entropy(text):
@@ -17,7 +19,7 @@ def calculate_shannon_entropy(text):
     int: 不同单词数量
     int: 总单词数量
     """
-    words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+    words = tokenize(text)
 
     if not words:
         return 0.0, 0, 0
@@ -43,39 +45,38 @@ def process_json_entropy(json_file_path: str) -> dict:
     返回:
         dict: 包含description及五种画面属性的平均熵值
     """
+    # 每个字段只保存常量内存的流式统计量，不保留逐条目的值
     entropy_data = {
-        'description': [],
-        'brushstroke': [],
-        'color': [],
-        'composition': [],
-        'light_and_shadow': [],
-        'line_quality': []
+        'description': RunningStats(),
+        'brushstroke': RunningStats(),
+        'color': RunningStats(),
+        'composition': RunningStats(),
+        'light_and_shadow': RunningStats(),
+        'line_quality': RunningStats()
     }
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-
-        for entry in data:
+        # 流式逐条读取，不把整个文件载入内存
+        for entry in iter_json_entries(json_file_path):
             try:
                 desc_text = entry['description']['first_section']['description']
                 entropy, _, _ = calculate_shannon_entropy(desc_text)
-                entropy_data['description'].append(entropy)
+                entropy_data['description'].add(entropy)
 
                 visual_attrs = entry['description']['second_section']['visual_attributes']
                 for attr in ['brushstroke', 'color', 'composition', 'light_and_shadow', 'line_quality']:
                     attr_text = visual_attrs.get(attr, '')
                     entropy, _, _ = calculate_shannon_entropy(attr_text)
-                    entropy_data[attr].append(entropy)
+                    entropy_data[attr].add(entropy)
 
             except KeyError as e:
                 print(f"警告: 条目缺少字段 {e}，跳过该条目")
                 continue
 
         avg_entropy = {}
-        for field, entropy_list in entropy_data.items():
-            if entropy_list:
-                avg_entropy[field] = mean(entropy_list)
+        for field, entropy_stats in entropy_data.items():
+            if entropy_stats.count:
+                avg_entropy[field] = entropy_stats.mean
             else:
                 avg_entropy[field] = 0.0
                 print(f"警告: 字段 {field} 没有有效数据，平均熵设为0.0")
@@ -1,7 +1,9 @@
 import json
-import re
 from collections import Counter
-from statistics import mean
+
+from annotation_stream import iter_json_entries
+from metric_stats import RunningStats
+from tokenizer import tokenize
 
 
 def calculate_ttr(text):
@@ -16,7 +18,7 @@ def calculate_ttr(text):
     int: 不同单词数量（types）
     int: 总单词数量（tokens）
     """
-    words = re.findall(r'\b[a-zA-Z]+\b', text.lower())
+    words = tokenize(text)
 
     if not words:
         return 0.0, 0, 0
@@ -38,39 +40,38 @@ def process_json_ttr(json_file_path):
     返回:
     dict: 包含description及五种画面属性的平均TTR
     """
+    # 每个字段只保存常量内存的流式统计量，不保留逐条目的值
     ttr_data = {
-        'description': [],
-        'brushstroke': [],
-        'color': [],
-        'composition': [],
-        'light_and_shadow': [],
-        'line_quality': []
+        'description': RunningStats(),
+        'brushstroke': RunningStats(),
+        'color': RunningStats(),
+        'composition': RunningStats(),
+        'light_and_shadow': RunningStats(),
+        'line_quality': RunningStats()
     }
 
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
-
-        for entry in data:
+        # 流式逐条读取，不把整个文件载入内存
+        for entry in iter_json_entries(json_file_path):
             try:
                 desc_text = entry['description']['first_section']['description']
                 ttr_desc, _, _ = calculate_ttr(desc_text)
-                ttr_data['description'].append(ttr_desc)
+                ttr_data['description'].add(ttr_desc)
 
                 visual_attrs = entry['description']['second_section']['visual_attributes']
                 for attr in ['brushstroke', 'color', 'composition', 'light_and_shadow', 'line_quality']:
                     attr_text = visual_attrs.get(attr, '')
                     ttr_attr, _, _ = calculate_ttr(attr_text)
-                    ttr_data[attr].append(ttr_attr)
+                    ttr_data[attr].add(ttr_attr)
 
             except KeyError as e:
                 print(f"警告: 条目缺少字段 {e}，跳过该条目")
                 continue
 
         avg_ttr = {}
-        for field, ttr_list in ttr_data.items():
-            if ttr_list:
-                avg_ttr[field] = mean(ttr_list)
+        for field, ttr_stats in ttr_data.items():
+            if ttr_stats.count:
+                avg_ttr[field] = ttr_stats.mean
             else:
                 avg_ttr[field] = 0.0
                 print(f"警告: 字段 {field} 没有有效数据，平均TTR设为0.0")
@@ -0,0 +1,147 @@
+import json
+import os
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from annotation_stream import iter_entry_spans
+
+# 索引文件：一行JSON头（版本、源文件签名、条目数）+ 小端 int64 的 [起点, 终点) 序列
+INDEX_SUFFIX = '.idx'
+_INDEX_VERSION = 1
+
+
+class AnnotationIndex:
+    """
+    标注文件的条目字节偏移索引，按下标随机读取并解析单个条目
+
+    build() 扫描文件（或复用与源文件大小、修改时间一致的旁路索引文件）并逐条追加偏移，
+    可在后台线程中运行：扫描过程中 len() 随之增长，已扫描到的条目即可读取。
+    最近解析过的条目保存在LRU缓存中
+
+    参数:
+        path (str): JSON（顶层数组）或 JSONL 标注文件
+        cache_size (int): 已解析条目的缓存数量
+        index_path (str): 旁路索引文件路径，默认为 path + '.idx'
+    """
+
+    def __init__(self, path: str, cache_size: int = 256, index_path: Optional[str] = None):
+        self.path = path
+        self.index_path = index_path or path + INDEX_SUFFIX
+        self.cache_size = cache_size
+        self.spans = array('q')
+        self.complete = False
+        self.from_cache = False
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._file = None
+        self._cancelled = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self.spans) // 2
+
+    def _signature(self) -> dict:
+        stat = os.stat(self.path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def build(self, progress: Optional[Callable[[int], None]] = None, report_every: int = 1000) -> 'AnnotationIndex':
+        """
+        建立索引；progress 每扫描 report_every 个条目以当前条目数回调一次（在调用线程中）
+
+        异常:
+            FileNotFoundError / json.JSONDecodeError: 源文件不存在或格式无效
+        """
+        signature = self._signature()
+        if self._load_index(signature):
+            self.from_cache = True
+        else:
+            spans = self.spans
+            for start, end in iter_entry_spans(self.path):
+                if self._cancelled.is_set():
+                    return self
+                spans.extend((start, end))
+                if progress is not None and len(self) % report_every == 0:
+                    progress(len(self))
+            self._save_index(signature)
+        self.complete = True
+        if progress is not None:
+            progress(len(self))
+        return self
+
+    def cancel(self):
+        """让后台线程中的 build() 尽快退出（例如切换到另一个文件时）"""
+        self._cancelled.set()
+
+    def _load_index(self, signature: dict) -> bool:
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = json.loads(f.readline())
+                if header.get('version') != _INDEX_VERSION or header.get('signature') != signature:
+                    return False
+                spans = array('q')
+                spans.frombytes(f.read())
+        except (OSError, ValueError):
+            return False
+        if len(spans) != 2 * header.get('count', -1):
+            return False
+        self.spans = spans
+        return True
+
+    def _save_index(self, signature: dict) -> None:
+        # 源文件目录不可写时跳过，下次重新扫描
+        tmp_path = self.index_path + '.tmp'
+        try:
+            with open(tmp_path, 'wb') as f:
+                header = {'version': _INDEX_VERSION, 'signature': signature, 'count': len(self)}
+                f.write(json.dumps(header).encode('utf-8') + b'\n')
+                self.spans.tofile(f)
+            os.replace(tmp_path, self.index_path)
+        except OSError:
+            pass
+
+    def __getitem__(self, item: int) -> Any:
+        """解析并返回第 item 个条目（支持负下标）"""
+        if item < 0:
+            item += len(self)
+        if not 0 <= item < len(self):
+            raise IndexError(item)
+        with self._lock:
+            value = self._cache.get(item)
+            if value is not None:
+                self._cache.move_to_end(item)
+                return value
+            start, end = self.spans[2 * item], self.spans[2 * item + 1]
+            if self._file is None:
+                self._file = open(self.path, 'rb')
+            self._file.seek(start)
+            value = json.loads(self._file.read(end - start))
+            self._cache[item] = value
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return value
+
+    def iter_entries(self) -> Iterator[Tuple[int, Any]]:
+        """
+        按顺序逐条解析已索引的条目，产出 (下标, 条目)；使用独立的文件句柄且不经过缓存，
+        可在后台线程中为整个文件建立其他索引。无法解析的条目跳过
+        """
+        with open(self.path, 'rb') as f:
+            for item in range(len(self)):
+                if self._cancelled.is_set():
+                    return
+                start, end = self.spans[2 * item], self.spans[2 * item + 1]
+                f.seek(start)
+                try:
+                    value = json.loads(f.read(end - start))
+                except ValueError:
+                    continue
+                yield item, value
+
+    def close(self):
+        self.cancel()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._cache.clear()
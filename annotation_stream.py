@@ -0,0 +1,144 @@
+import json
+from typing import Any, Iterator, Tuple
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = ' \t\r\n'
+_UTF8_BOM = '\xef\xbb\xbf'  # 以 latin-1 读入时 UTF-8 BOM 的三个字符
+
+
+def iter_json_entries(json_file_path: str, chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    逐条读取标注文件中的条目，内存占用与文件大小无关
+
+    支持两种格式:
+        顶层为数组的JSON文件（[{...}, {...}, ...]），按块读取并逐个解析数组元素
+        JSONL文件（每行一个JSON条目），空行会被忽略
+
+    参数:
+        json_file_path (str): JSON/JSONL文件路径
+        chunk_size (int): 每次读取的字符数
+
+    返回:
+        生成器，逐条产出解析后的条目
+    异常:
+        FileNotFoundError: 文件不存在
+        json.JSONDecodeError: 文件格式无效
+    """
+    with open(json_file_path, 'r', encoding='utf-8') as file:
+        head = file.read(chunk_size)
+        start = len(head) - len(head.lstrip(_WHITESPACE + '\ufeff'))
+        if head[start:start + 1] == '[':
+            yield from _iter_array(file, head, start + 1, chunk_size)
+        else:
+            file.seek(0)
+            yield from _iter_jsonl(file)
+
+
+def iter_entry_spans(json_file_path: str, chunk_size: int = 1 << 20) -> Iterator[Tuple[int, int]]:
+    """
+    逐条产出标注文件中每个条目的字节区间 [起点, 终点)，用于按需随机读取单个条目
+
+    顶层为数组时扫描数组元素；否则按 JSONL 逐行划分（首个非空行不是完整JSON时，
+    视为单个多行JSON文档，整个文件作为一个条目）。
+    文件以 latin-1 读入，使字符位置与字节位置一一对应；多字节 UTF-8 字符只会出现在字符串内部，
+    不影响结构解析（此时解析出的值不使用）
+
+    异常:
+        FileNotFoundError: 文件不存在
+        json.JSONDecodeError: 数组格式无效
+    """
+    with open(json_file_path, 'r', encoding='latin-1', newline='') as file:
+        head = file.read(chunk_size)
+        start = len(_UTF8_BOM) if head.startswith(_UTF8_BOM) else 0
+        start += len(head[start:]) - len(head[start:].lstrip(_WHITESPACE))
+        if head[start:start + 1] == '[':
+            yield from _iter_array(file, head, start + 1, chunk_size, spans=True)
+            return
+
+    yield from _iter_jsonl_spans(json_file_path, start)
+
+
+def _iter_jsonl_spans(json_file_path: str, start: int) -> Iterator[Tuple[int, int]]:
+    with open(json_file_path, 'rb') as file:
+        file.seek(start)
+        position = start
+        checked = False
+        for line in file:
+            stripped = line.strip()
+            if stripped:
+                offset = position + len(line) - len(line.lstrip())
+                if not checked:
+                    checked = True
+                    try:
+                        json.loads(stripped)
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # 单个多行JSON文档：从首个非空字符到文件末尾（末尾空白不影响解析）
+                        yield offset, file.seek(0, 2)
+                        return
+                yield offset, offset + len(stripped)
+            position += len(line)
+
+
+def _iter_jsonl(file) -> Iterator[Any]:
+    for line_number, line in enumerate(file, 1):
+        line = line.strip().lstrip('\ufeff')
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            raise json.JSONDecodeError(f"第{line_number}行: {e.msg}", e.doc, e.pos) from None
+
+
+def _iter_array(file, buffer: str, index: int, chunk_size: int, spans: bool = False) -> Iterator[Any]:
+    """逐个产出数组元素；spans=True 时改为产出元素在文件中的字符区间 (起点, 终点)"""
+    base = 0             # buffer[0] 在文件中的字符位置
+    eof = False
+    first = True         # 尚未产出任何元素，允许空数组 "[]"
+    expect_value = True  # 数组开头或逗号之后需要一个元素
+
+    while True:
+        # 跳过空白；缓冲区耗尽时继续读取
+        while True:
+            while index < len(buffer) and buffer[index] in _WHITESPACE:
+                index += 1
+            if index < len(buffer) or eof:
+                break
+            base += index
+            buffer, index, eof = _refill(file, buffer, index, chunk_size)
+
+        if index >= len(buffer):
+            raise json.JSONDecodeError("数组未闭合", buffer, index)
+
+        char = buffer[index]
+        if char == ']' and (first or not expect_value):
+            return
+        if char == ',' and not expect_value:
+            index += 1
+            expect_value = True
+            continue
+        if not expect_value:
+            raise json.JSONDecodeError("数组元素之间缺少逗号", buffer, index)
+
+        # 解析一个元素；元素可能跨块，解析失败或恰好到达缓冲区末尾时读取更多内容再试
+        while True:
+            try:
+                value, end = _DECODER.raw_decode(buffer, index)
+                if end < len(buffer) or eof:
+                    break
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            base += index
+            buffer, index, eof = _refill(file, buffer, index, chunk_size)
+
+        yield (base + index, base + end) if spans else value
+        index = end
+        first = False
+        expect_value = False
+
+
+def _refill(file, buffer: str, index: int, chunk_size: int):
+    """丢弃已消费的前缀并追加下一块内容"""
+    chunk = file.read(chunk_size)
+    return buffer[index:] + chunk, 0, not chunk
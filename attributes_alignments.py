@@ -1,9 +1,10 @@
-import torch
 from PIL import Image
-from transformers import AutoModel, AutoTokenizer
-from peft import PeftModel
+import argparse
 import json
+import math
+import multiprocessing
 import os
+import re
 from tqdm import tqdm
 
 # 严格使用您提供的原始问题
@@ -15,7 +16,15 @@ QUESTIONS = [
     "Describe the line quality of this painting."
 ]
 
+# 与QUESTIONS一一对应的结果字段：笔触、色彩、构图、光影、线条
+ATTRIBUTE_KEYS = ["brushstroke", "color", "composition", "light_and_shadow", "line_quality"]
+
 def load_model():
+    # 只在真正加载模型时导入，传入替身模型时（如基准测试）不需要GPU依赖
+    import torch
+    from peft import PeftModel
+    from transformers import AutoModel, AutoTokenizer
+
     model = AutoModel.from_pretrained(
         "/root/autodl-tmp/models/modelscope/models/OpenBMB/MiniCPM-V-2_6",
         trust_remote_code=True,
@@ -32,69 +41,497 @@ def load_model():
     )
     return model, tokenizer
 
-def analyze_single_image(model, tokenizer, img_path):
-    """完全独立的五轮提问，无任何上下文干扰"""
+def compute_vision_hidden_states(model, image):
+    """
+    对单张图像只运行一次视觉编码器，返回可传给 model.chat(vision_hidden_states=[...]) 的特征
+    模型不是 MiniCPM-V（没有 get_vllm_embedding，例如替身模型）时返回 None
+
+    MiniCPM-V 2.6 的 chat/generate 收到 vision_hidden_states（每段对话一项）时跳过视觉编码器，
+    但仍要用对话中的图像生成切片占位符，因此图像照常放在 msgs 里。
+    这里用与 chat 相同的 processor 和默认切片数处理图像，得到的特征与 chat 内部计算的一致；
+    LoRA 注入在原模型的模块上，经 get_base_model() 调用同样生效
+    """
+    base = model.get_base_model() if hasattr(model, "get_base_model") else model
+    if not hasattr(base, "get_vllm_embedding"):
+        return None
+
+    import torch
+
+    processor = getattr(base, "processor", None)
+    if processor is None:
+        from transformers import AutoProcessor
+        processor = base.processor = AutoProcessor.from_pretrained(base.config._name_or_path,
+                                                                   trust_remote_code=True)
+    prompt = processor.tokenizer.apply_chat_template(
+        [{"role": "user", "content": "(<image>./</image>)"}], tokenize=False, add_generation_prompt=True)
+    inputs = processor([prompt], [[image]], return_tensors="pt").to(base.device)
+    inputs.pop("image_sizes", None)
+    with torch.inference_mode():
+        _, vision_hidden_states = base.get_vllm_embedding(inputs)
+    return vision_hidden_states[0]
+
+
+def chat(model, tokenizer, msgs, vision_states=None):
+    """调用 model.chat；vision_states 为与对话一一对应的视觉特征列表（None 表示由模型自行编码图像）"""
+    if vision_states is None:
+        return model.chat(image=None, msgs=msgs, tokenizer=tokenizer)
+    return model.chat(image=None, msgs=msgs, tokenizer=tokenizer, vision_hidden_states=vision_states)
+
+
+def analyze_single_image(model, tokenizer, img_path, batched=True):
+    """
+    完全独立的五轮提问，无任何上下文干扰
+    图像只解码一次、视觉编码器只运行一次（MiniCPM-V），五个问题共用；
+    batched=True 时五个问题作为五段互不相关的对话一次批量生成，batched=False 时逐个问题调用 model.chat
+    """
     img_name = os.path.splitext(os.path.basename(img_path))[0]
-    results = {}
-    
+
     try:
-        # 第一问：笔触
+        # 图像只解码一次，五个问题共用
         img = Image.open(img_path).convert("RGB")
-        msgs = [{"role": "user", "content": [img, QUESTIONS[0]]}]
-        results["brushstroke"] = model.chat(image=None, msgs=msgs, tokenizer=tokenizer).strip()
-        
-        # 第二问：色彩（全新会话）
-        img = Image.open(img_path).convert("RGB")
-        msgs = [{"role": "user", "content": [img, QUESTIONS[1]]}]
-        results["color"] = model.chat(image=None, msgs=msgs, tokenizer=tokenizer).strip()
-        
-        # 第三问：构图（全新会话）
-        img = Image.open(img_path).convert("RGB")
-        msgs = [{"role": "user", "content": [img, QUESTIONS[2]]}]
-        results["composition"] = model.chat(image=None, msgs=msgs, tokenizer=tokenizer).strip()
-        
-        # 第四问：光影（全新会话）
-        img = Image.open(img_path).convert("RGB")
-        msgs = [{"role": "user", "content": [img, QUESTIONS[3]]}]
-        results["light_and_shadow"] = model.chat(image=None, msgs=msgs, tokenizer=tokenizer).strip()
-        
-        # 第五问：线条（全新会话）
-        img = Image.open(img_path).convert("RGB")
-        msgs = [{"role": "user", "content": [img, QUESTIONS[4]]}]
-        results["line_quality"] = model.chat(image=None, msgs=msgs, tokenizer=tokenizer).strip()
-        
+        vision_states = compute_vision_hidden_states(model, img)
+        # 每个问题都是全新会话
+        conversations = [[{"role": "user", "content": [img, question]}] for question in QUESTIONS]
+
+        if batched:
+            answers = chat(model, tokenizer, conversations,
+                           None if vision_states is None else [vision_states] * len(conversations))
+        else:
+            answers = [chat(model, tokenizer, msgs, None if vision_states is None else [vision_states])
+                       for msgs in conversations]
+
+        results = {key: answer.strip() for key, answer in zip(ATTRIBUTE_KEYS, answers)}
+
     except Exception as e:
         print(f"Error processing {img_name}: {str(e)}")
         return None
-    
+
     return {img_name: results}
 
-def process_all_images(input_dir, output_dir):
+def estimate_prompt_length(tokenizer, question, image_size):
+    """
+    估计一条 (图像, 问题) 请求的提示长度，用于按长度分桶减少padding
+    MiniCPM-V 2.6 将图像按 448×448 切片（最多9片），每片占64个query token
+    """
+    width, height = image_size
+    slices = min(9, max(1, math.ceil(width * height / (448 * 448))))
+    if hasattr(tokenizer, "encode"):
+        question_tokens = len(tokenizer.encode(question))
+    else:
+        question_tokens = len(question.split())
+    return slices * 64 + question_tokens
+
+
+# 分桶粒度（token）：五个问题的长度只差几个token，通常落在同一个桶里
+LENGTH_BUCKET = 32
+
+
+class AttributeBatchScheduler:
+    """
+    跨图像批量调度器：把多张图像的 (图像, 问题) 请求按提示长度分桶，
+    凑成固定大小的批次一起调用 model.chat，再把答案分发回各自图像的结果中
+    每段对话仍然只包含一个问题，互不共享上下文
+    桶内按图像顺序排列，同一图像的请求相邻；图像在第一个请求所在的批次才解码，
+    最后一个请求完成后立即释放，同时驻留内存的解码图像约为一个批次涉及的图像数；
+    MiniCPM-V 的视觉特征同样每张图像只计算一次，供它的五个问题共用
+    参数:
+    model: 实现 MiniCPM-V chat 接口（msgs 可为对话列表）的模型
+    tokenizer: 分词器
+    batch_size: 每次 model.chat 的对话数
+    window_images: 每个调度窗口包含的图像数，窗口内排序分桶
+    """
+
+    def __init__(self, model, tokenizer, batch_size=8, window_images=64):
+        self.model = model
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.window_images = window_images
+
+    def _run_batch(self, batch, images, vision=None):
+        """执行一个批次；整批失败时逐条重试，把出错的请求隔离出来"""
+        conversations = [[{"role": "user", "content": [images[img_path], QUESTIONS[q]]}] for img_path, q in batch]
+        states = None
+        if vision is not None and all(vision.get(img_path) is not None for img_path, _ in batch):
+            states = [vision[img_path] for img_path, _ in batch]
+        try:
+            return chat(self.model, self.tokenizer, conversations, states)
+        except Exception:
+            if len(batch) == 1:
+                raise
+        answers = []
+        for index, (msgs, (img_path, _)) in enumerate(zip(conversations, batch)):
+            try:
+                answers.append(chat(self.model, self.tokenizer, msgs,
+                                    None if states is None else [states[index]]))
+            except Exception as e:
+                print(f"Error processing {os.path.splitext(os.path.basename(img_path))[0]}: {str(e)}")
+                answers.append(None)
+        return answers
+
+    def _run_window(self, img_paths):
+        requests = []
+        for order, img_path in enumerate(img_paths):
+            try:
+                # 只读取文件头中的尺寸，不解码像素
+                with Image.open(img_path) as img:
+                    size = img.size
+            except Exception as e:
+                print(f"Error processing {os.path.splitext(os.path.basename(img_path))[0]}: {str(e)}")
+                continue
+            for q in range(len(QUESTIONS)):
+                length = estimate_prompt_length(self.tokenizer, QUESTIONS[q], size)
+                requests.append((length // LENGTH_BUCKET, order, q, img_path))
+
+        # 按提示长度分桶排序后切分批次，同一批次内长度相近；桶内同一图像的请求相邻
+        requests.sort(key=lambda request: request[:3])
+        remaining = {}
+        for _, _, _, img_path in requests:
+            remaining[img_path] = remaining.get(img_path, 0) + 1
+
+        images = {}
+        vision = {}
+        answers = {}
+        for start in range(0, len(requests), self.batch_size):
+            batch = []
+            for _, _, q, img_path in requests[start:start + self.batch_size]:
+                if img_path not in images:
+                    try:
+                        images[img_path] = Image.open(img_path).convert("RGB")
+                        vision[img_path] = compute_vision_hidden_states(self.model, images[img_path])
+                    except Exception as e:
+                        print(f"Error processing {os.path.splitext(os.path.basename(img_path))[0]}: {str(e)}")
+                        images[img_path] = None
+                if images[img_path] is None:
+                    answers[(img_path, q)] = None
+                else:
+                    batch.append((img_path, q))
+
+            if batch:
+                try:
+                    batch_answers = self._run_batch(batch, images, vision)
+                except Exception as e:
+                    print(f"Error processing batch: {str(e)}")
+                    batch_answers = [None] * len(batch)
+                for (img_path, q), answer in zip(batch, batch_answers):
+                    answers[(img_path, q)] = answer
+
+            # 释放已答完全部问题的图像
+            for _, _, _, img_path in requests[start:start + self.batch_size]:
+                remaining[img_path] -= 1
+                if not remaining[img_path]:
+                    del images[img_path]
+                    vision.pop(img_path, None)
+
+        for img_path in img_paths:
+            image_answers = [answers.get((img_path, q)) for q in range(len(QUESTIONS))]
+            if any(answer is None for answer in image_answers):
+                yield img_path, None
+            else:
+                yield img_path, {key: answer.strip() for key, answer in zip(ATTRIBUTE_KEYS, image_answers)}
+
+    def iter_results(self, img_paths):
+        """
+        按输入顺序逐张产出 (图像路径, 结果字典)；任一问题失败的图像结果为 None
+        """
+        img_paths = list(img_paths)
+        for start in range(0, len(img_paths), self.window_images):
+            yield from self._run_window(img_paths[start:start + self.window_images])
+
+
+def iter_image_results(model, tokenizer, img_paths, batch_size=None, desc=None):
+    """逐张产出 (图像名, 结果字典)，失败的图像跳过"""
+    if batch_size:
+        scheduler = AttributeBatchScheduler(model, tokenizer, batch_size)
+        for img_path, result in tqdm(scheduler.iter_results(img_paths), total=len(img_paths), desc=desc):
+            if result:
+                yield os.path.splitext(os.path.basename(img_path))[0], result
+    else:
+        for img_path in tqdm(img_paths, desc=desc):
+            result = analyze_single_image(model, tokenizer, img_path)
+            if result:
+                yield from result.items()
+
+
+def truncate_torn_line(partial_path):
+    """截掉崩溃时写了一半、没有换行结尾的末行，保证后续追加从新的一行开始"""
+    with open(partial_path, 'rb+') as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        position = size
+        while position > 0:
+            step = min(4096, position)
+            f.seek(position - step)
+            chunk = f.read(step)
+            newline = chunk.rfind(b"\n")
+            if newline >= 0:
+                position = position - step + newline + 1
+                break
+            position -= step
+        if position < size:
+            f.truncate(position)
+
+
+def load_done_images(partial_path):
+    """读取追加写入的JSONL中已完成的图像名；崩溃时写了一半的末行会被截掉"""
+    done = set()
+    if not os.path.exists(partial_path):
+        return done
+    truncate_torn_line(partial_path)
+    with open(partial_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                done.update(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return done
+
+
+def iter_jsonl_results(paths):
+    """依次流式读取若干JSONL结果文件，产出 (图像名, 结果字典)"""
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                yield from record.items()
+
+
+def write_json_object(items, output_path):
+    """
+    把 (键, 值) 流式写成与 json.dump(dict, indent=2, ensure_ascii=False) 相同格式的JSON对象
+    先写临时文件再原子替换；重复的键保留第一次出现的值
+    返回:
+    int: 写入的条目数
+    """
+    tmp_path = output_path + ".tmp"
+    seen = set()
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        for key, value in items:
+            if key in seen:
+                continue
+            f.write("{\n" if not seen else ",\n")
+            seen.add(key)
+            body = json.dumps(value, indent=2, ensure_ascii=False).replace("\n", "\n  ")
+            f.write(f"  {json.dumps(key, ensure_ascii=False)}: {body}")
+        f.write("\n}" if seen else "{}")
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, output_path)
+    return len(seen)
+
+
+def process_all_images(input_dir, output_dir, batch_size=None, model=None, tokenizer=None, resume=True):
+    """
+    batch_size 为 None 时逐张图像处理；否则使用跨图像批量调度器，每次 model.chat 处理 batch_size 段对话
+    model/tokenizer 可传入已加载的模型（如测试用的替身模型），默认调用 load_model
+    每张图像的结果立即追加到 {folder}.jsonl，文件夹完成后原子合并为 {folder}.json；
+    resume=True 时跳过已生成 {folder}.json 的文件夹及JSONL中已有的图像
+    """
     os.makedirs(output_dir, exist_ok=True)
-    model, tokenizer = load_model()
-    
+    if model is None:
+        model, tokenizer = load_model()
+
     for folder in os.listdir(input_dir):
         folder_path = os.path.join(input_dir, folder)
         if not os.path.isdir(folder_path):
             continue
-            
-        all_results = {}
-        png_files = [f for f in os.listdir(folder_path) if f.lower().endswith('.png')]
-        
-        for img_file in tqdm(png_files, desc=f"Processing {folder}"):
-            img_path = os.path.join(folder_path, img_file)
-            result = analyze_single_image(model, tokenizer, img_path)
-            if result:
-                all_results.update(result)
-        
+
+        output_path = os.path.join(output_dir, f"{folder}.json")
+        partial_path = os.path.join(output_dir, f"{folder}.jsonl")
+        if resume and os.path.exists(output_path) and not os.path.exists(partial_path):
+            print(f"Skipping {folder}: {output_path} already exists")
+            continue
+
+        done = load_done_images(partial_path) if resume else set()
+        png_files = list_png_files(folder_path)
+        img_paths = [os.path.join(folder_path, img_file) for img_file in png_files
+                     if os.path.splitext(img_file)[0] not in done]
+
+        with open(partial_path, 'a' if resume else 'w', encoding='utf-8') as partial:
+            for img_name, result in iter_image_results(model, tokenizer, img_paths, batch_size,
+                                                       desc=f"Processing {folder}"):
+                partial.write(json.dumps({img_name: result}, ensure_ascii=False) + "\n")
+                partial.flush()
+                os.fsync(partial.fileno())
+
+        count = write_json_object(iter_jsonl_results([partial_path]), output_path)
+        os.remove(partial_path)
+
+        print(f"Saved {count} results to {output_path}")
+
+def list_png_files(folder_path):
+    return [f for f in os.listdir(folder_path) if f.lower().endswith('.png')]
+
+
+def plan_shards(input_dir, num_shards):
+    """
+    把所有文件夹中的图像按 (文件夹, 文件名) 排序后切成 num_shards 段连续区间，
+    各段图像数最多相差1；结果只取决于目录内容，各机器/进程独立计算也一致
+    返回:
+    list: 每个分片的 [(文件夹, 文件名), ...]
+    """
+    work = []
+    for folder in sorted(os.listdir(input_dir)):
+        folder_path = os.path.join(input_dir, folder)
+        if os.path.isdir(folder_path):
+            work.extend((folder, img_file) for img_file in sorted(list_png_files(folder_path)))
+    base, extra = divmod(len(work), num_shards)
+    shards = []
+    start = 0
+    for index in range(num_shards):
+        end = start + base + (1 if index < extra else 0)
+        shards.append(work[start:end])
+        start = end
+    return shards
+
+
+def shard_partial_path(output_dir, folder, shard_index, num_shards):
+    return os.path.join(output_dir, f"{folder}.shard-{shard_index}-of-{num_shards}.jsonl")
+
+
+def shard_done_path(output_dir, shard_index, num_shards):
+    return os.path.join(output_dir, f"_shard-{shard_index}-of-{num_shards}.done")
+
+
+def process_shard(input_dir, output_dir, shard_index, num_shards, batch_size=None, model=None, tokenizer=None):
+    """
+    只处理第 shard_index 个分片（从0开始）的图像，结果追加到 {folder}.shard-i-of-N.jsonl，
+    可随时中断后重新运行续跑；完成后写出 _shard-i-of-N.done 标记
+    """
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise ValueError(f"分片编号必须满足 0 <= shard_index < num_shards，当前为 {shard_index}/{num_shards}")
+    os.makedirs(output_dir, exist_ok=True)
+    if model is None:
+        model, tokenizer = load_model()
+
+    work = plan_shards(input_dir, num_shards)[shard_index]
+    folders = {}
+    for folder, img_file in work:
+        folders.setdefault(folder, []).append(img_file)
+
+    for folder, img_files in folders.items():
+        partial_path = shard_partial_path(output_dir, folder, shard_index, num_shards)
+        done = load_done_images(partial_path)
+        img_paths = [os.path.join(input_dir, folder, img_file) for img_file in img_files
+                     if os.path.splitext(img_file)[0] not in done]
+
+        with open(partial_path, 'a', encoding='utf-8') as partial:
+            for img_name, result in iter_image_results(model, tokenizer, img_paths, batch_size,
+                                                       desc=f"[{shard_index}/{num_shards}] {folder}"):
+                partial.write(json.dumps({img_name: result}, ensure_ascii=False) + "\n")
+                partial.flush()
+                os.fsync(partial.fileno())
+
+    with open(shard_done_path(output_dir, shard_index, num_shards), 'w', encoding='utf-8') as f:
+        f.write(f"{len(work)}\n")
+
+
+def merge_shards(output_dir, num_shards, force=False):
+    """
+    按分片顺序合并各分片的JSONL，写出与单进程相同布局的 {folder}.json
+    分片是排序后的连续区间，因此合并结果顺序确定；合并成功后删除分片文件
+    """
+    missing = [index for index in range(num_shards)
+               if not os.path.exists(shard_done_path(output_dir, index, num_shards))]
+    if missing and not force:
+        raise RuntimeError(f"分片 {missing} 尚未完成，无法合并（可使用 force=True 强制合并）")
+
+    suffix_pattern = re.compile(rf"^(.*)\.shard-(\d+)-of-{num_shards}\.jsonl$")
+    partials = {}
+    for name in os.listdir(output_dir):
+        match = suffix_pattern.match(name)
+        if match:
+            partials.setdefault(match.group(1), []).append((int(match.group(2)), os.path.join(output_dir, name)))
+
+    for folder, parts in sorted(partials.items()):
+        paths = [path for _, path in sorted(parts)]
         output_path = os.path.join(output_dir, f"{folder}.json")
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(all_results, f, indent=2, ensure_ascii=False)
-        
-        print(f"Saved {len(all_results)} results to {output_path}")
+        count = write_json_object(iter_jsonl_results(paths), output_path)
+        for path in paths:
+            os.remove(path)
+        print(f"Saved {count} results to {output_path}")
+
+    for index in range(num_shards):
+        done_path = shard_done_path(output_dir, index, num_shards)
+        if os.path.exists(done_path):
+            os.remove(done_path)
+
+
+def _shard_worker(input_dir, output_dir, shard_index, num_shards, batch_size, gpu, model_factory):
+    if gpu is not None:
+        # 必须在子进程初始化CUDA之前设置
+        os.environ["CUDA_VISIBLE_DEVICES"] = str(gpu)
+    model, tokenizer = model_factory()
+    process_shard(input_dir, output_dir, shard_index, num_shards, batch_size, model, tokenizer)
+
+
+def run_local_workers(input_dir, output_dir, num_workers, batch_size=None, gpus=None, model_factory=load_model):
+    """
+    在本机启动 num_workers 个进程，各自处理一个分片，全部完成后合并输出
+    gpus: 可选，每个进程使用的GPU编号列表（按进程轮流分配）
+    model_factory: 在子进程中加载 (model, tokenizer) 的模块级函数
+    """
+    context = multiprocessing.get_context("spawn")
+    workers = []
+    for index in range(num_workers):
+        gpu = gpus[index % len(gpus)] if gpus else None
+        worker = context.Process(target=_shard_worker,
+                                 args=(input_dir, output_dir, index, num_workers, batch_size, gpu, model_factory))
+        worker.start()
+        workers.append(worker)
+    for worker in workers:
+        worker.join()
+
+    failed = [index for index, worker in enumerate(workers) if worker.exitcode != 0]
+    if failed:
+        raise RuntimeError(f"分片 {failed} 执行失败，重新运行可续跑未完成的图像")
+    merge_shards(output_dir, num_workers)
+
+
+def parse_shard(value):
+    """解析 --shard 的 "i/N"（i 从0开始）"""
+    try:
+        shard_index, num_shards = (int(part) for part in value.split("/"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected i/N such as 0/4, got {value!r}")
+    if num_shards < 1 or not 0 <= shard_index < num_shards:
+        raise argparse.ArgumentTypeError(f"shard index must satisfy 0 <= i < N, got {value!r}")
+    return shard_index, num_shards
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Generate visual attribute descriptions with MiniCPM-V")
+    parser.add_argument("--input-dir", default="flux-dev")
+    parser.add_argument("--output-dir", default="flux-dev-attributes")
+    parser.add_argument("--batch-size", type=int, default=None,
+                        help="conversations per model.chat call (cross-image batching)")
+    parser.add_argument("--shard", type=parse_shard, default=None, help="process only shard i/N (0-based), e.g. 0/4")
+    parser.add_argument("--merge", type=int, default=None, metavar="N", help="merge the outputs of N shards")
+    parser.add_argument("--workers", type=int, default=None, help="run N local shard processes and merge")
+    parser.add_argument("--gpus", default=None, help="comma-separated GPU ids for --workers")
+    args = parser.parse_args()
+    for option in ("merge", "workers"):
+        value = getattr(args, option)
+        if value is not None and value < 1:
+            parser.error(f"argument --{option}: N must be at least 1, got {value}")
+    return args
+
 
 if __name__ == "__main__":
-    process_all_images(
-        input_dir="flux-dev",
-        output_dir="flux-dev-attributes"
-    )
+    args = parse_args()
+    if args.shard is not None:
+        shard_index, num_shards = args.shard
+        process_shard(args.input_dir, args.output_dir, shard_index, num_shards, args.batch_size)
+    elif args.merge is not None:
+        merge_shards(args.output_dir, args.merge)
+    elif args.workers is not None:
+        gpus = [gpu.strip() for gpu in args.gpus.split(",")] if args.gpus else None
+        run_local_workers(args.input_dir, args.output_dir, args.workers, args.batch_size, gpus)
+    else:
+        process_all_images(
+            input_dir=args.input_dir,
+            output_dir=args.output_dir,
+            batch_size=args.batch_size
+        )
@@ -0,0 +1,559 @@
+import argparse
+import importlib.util
+import json
+import multiprocessing
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+from annotation_stream import iter_json_entries
+from lexical_metrics import ATTRIBUTE_FIELDS
+from tokenizer import DEFAULT_TOKENIZER
+
+# 默认规模：与 EmoArt 全量（约13万条）及两个较小的规模
+DEFAULT_SCALES = (1000, 10000, 130000)
+
+# 合成数据集默认放在系统临时目录（13万条规模约数百MB），不写进仓库
+DEFAULT_DATA_DIR = os.path.join(tempfile.gettempdir(), "artvision_bench_data")
+
+STYLES = ["Abstract Art", "Baroque", "Cubism", "Impressionism", "Ukiyo-e"]
+EMOTIONS = ["joy", "awe", "melancholy", "serenity", "fear", "nostalgia", "tension"]
+VALENCES = ["positive", "neutral", "negative"]
+AROUSALS = ["low", "medium", "high"]
+
+# 合成文本的词表：绘画描述常用词 + 功能词，按 Zipf 分布抽样，接近真实文本的重复程度
+_WORDS = (
+    "the a of and in with to is by its on that as from this painting canvas brushstroke stroke brush color "
+    "colors palette hue tone tones light shadow shadows contrast composition balance rhythm line lines curve "
+    "curves texture surface layer layers form forms figure figures background foreground space depth edge "
+    "edges warm cool soft bold dark bright deep pale vivid muted rich subtle golden blue red green yellow ochre "
+    "crimson violet earthy luminous dramatic gentle dynamic calm serene vibrant melancholic harmonious "
+    "expressive delicate thick thin loose precise fluid angular geometric organic flowing fragmented "
+    "diagonal vertical horizontal central symmetrical asymmetrical creates suggests evokes conveys emphasizes "
+    "highlights guides draws viewer eye attention mood atmosphere sense movement energy tension harmony "
+    "emotion quiet intimate grand scene landscape portrait sky water tree trees mountain river city street "
+    "interior window light-filled well-defined impasto glaze wash gradient chiaroscuro sfumato"
+).split()
+
+
+def _zipf_weights(n):
+    weights = 1.0 / np.arange(1, n + 1)
+    return (np.cumsum(weights) / weights.sum()).tolist()
+
+
+_CUM_WEIGHTS = _zipf_weights(len(_WORDS))
+
+
+def synthetic_text(rng, min_words, max_words):
+    """生成一段随机长度的英文描述，带少量标点和大写"""
+    words = rng.choices(_WORDS, cum_weights=_CUM_WEIGHTS, k=rng.randint(min_words, max_words))
+    sentences = []
+    for start in range(0, len(words), 14):
+        sentence = " ".join(words[start:start + 14])
+        sentences.append(sentence[:1].upper() + sentence[1:] + ".")
+    return " ".join(sentences)
+
+
+def synthetic_entry(rng, index, num_images):
+    """与 EmoArt 标注结构一致的一个条目；image_path 循环引用 num_images 张图像"""
+    image_index = index % num_images if num_images else index
+    style = STYLES[image_index % len(STYLES)]
+    return {
+        "request_id": f"bench-{index:07d}",
+        "image_path": f"{style}/{image_index:06d}.png",
+        "description": {
+            "first_section": {"description": synthetic_text(rng, 60, 160)},
+            "second_section": {
+                "visual_attributes": {attr: synthetic_text(rng, 15, 45) for attr in ATTRIBUTE_FIELDS},
+                "emotional_impact": synthetic_text(rng, 10, 30),
+            },
+            "third_section": {
+                "emotional_arousal_level": rng.choice(AROUSALS),
+                "emotional_valence": rng.choice(VALENCES),
+                "dominant_emotion": rng.choice(EMOTIONS),
+            },
+        },
+    }
+
+
+def generate_annotations(path, num_entries, num_images, seed=0):
+    """逐条写出顶层为数组的标注JSON（indent=2），先写临时文件再原子替换"""
+    rng = random.Random(seed)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for index in range(num_entries):
+            f.write(",\n" if index else "\n")
+            f.write(json.dumps(synthetic_entry(rng, index, num_images), indent=2, ensure_ascii=False))
+        f.write("\n]")
+    os.replace(tmp_path, path)
+
+
+def generate_images(image_root, num_images, size=512, seed=0):
+    """按画风子目录生成 num_images 张带噪声渐变的PNG，已存在的文件跳过"""
+    from PIL import Image
+
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(0, 255, size, dtype=np.float32)
+    paths = []
+    for image_index in range(num_images):
+        style = STYLES[image_index % len(STYLES)]
+        path = os.path.join(image_root, style, f"{image_index:06d}.png")
+        paths.append(path)
+        if os.path.exists(path):
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        base = rng.integers(0, 256, size=3).astype(np.float32)
+        noise = rng.normal(0, 24, size=(size, size, 3)).astype(np.float32)
+        pixels = (base + gradient[:, None, None] * 0.5 + gradient[None, :, None] * 0.3 + noise) % 256
+        Image.fromarray(pixels.astype(np.uint8)).save(path)
+    return paths
+
+
+def prepare_dataset(data_dir, num_entries, max_images, seed=0):
+    """
+    生成（或复用）某个规模的合成数据集
+
+    返回:
+        dict: json_path, image_root, image_paths, entries, work_dir
+    """
+    num_images = min(num_entries, max_images)
+    directory = os.path.join(data_dir, f"n{num_entries}_img{num_images}_seed{seed}")
+    json_path = os.path.join(directory, "annotations.json")
+    image_root = os.path.join(directory, "images")
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(json_path):
+        print(f"生成 {num_entries} 条标注: {json_path}")
+        generate_annotations(json_path, num_entries, num_images, seed)
+    image_paths = generate_images(image_root, num_images, seed=seed) if num_images else []
+    work_dir = os.path.join(directory, "work")
+    os.makedirs(work_dir, exist_ok=True)
+    return {"json_path": json_path, "image_root": image_root, "image_paths": image_paths,
+            "entries": num_entries, "work_dir": work_dir}
+
+
+def load_texts(json_path):
+    """按各脚本的处理顺序取出所有 description 与画面属性文本"""
+    texts = []
+    for entry in iter_json_entries(json_path):
+        try:
+            texts.append(entry["description"]["first_section"]["description"])
+            visual_attrs = entry["description"]["second_section"]["visual_attributes"]
+            texts.extend(visual_attrs.get(attr, "") for attr in ATTRIBUTE_FIELDS)
+        except KeyError:
+            continue
+    return texts
+
+
+def load_pairs(dataset):
+    """每张合成图像取第一条引用它的条目，组成 (图像路径, 描述) 对"""
+    pairs = []
+    for entry in iter_json_entries(dataset["json_path"]):
+        if len(pairs) >= len(dataset["image_paths"]):
+            break
+        pairs.append((os.path.join(dataset["image_root"], entry["image_path"]),
+                      entry["description"]["first_section"]["description"]))
+    return pairs
+
+
+def _load_script(module_name, filename):
+    """按路径导入文件名不是合法模块名的脚本（如 "Shannon entropy.py"）"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(module_name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def build_tiny_clip(embed_dim=64, input_resolution=224):
+    """
+    接口与 openai/CLIP 模型一致的小型替身（encode_image / encode_text / visual.input_resolution），
+    预处理与真实CLIP相同，因此图像解码和预处理开销是真实的，只有模型前向被替换
+    """
+    import torch
+    from torchvision import transforms
+
+    class TinyClip(torch.nn.Module):
+        def __init__(self):
+            super().__init__()
+            torch.manual_seed(0)
+            self.visual = torch.nn.Module()
+            self.visual.input_resolution = input_resolution
+            self.image_pool = torch.nn.AdaptiveAvgPool2d(8)
+            self.image_proj = torch.nn.Linear(3 * 8 * 8, embed_dim)
+            self.token_embedding = torch.nn.Embedding(49408, embed_dim)
+
+        def encode_image(self, images):
+            return self.image_proj(self.image_pool(images).flatten(1))
+
+        def encode_text(self, tokens):
+            return self.token_embedding(tokens).mean(dim=1)
+
+    preprocess = transforms.Compose([
+        transforms.Resize(input_resolution, interpolation=transforms.InterpolationMode.BICUBIC),
+        transforms.CenterCrop(input_resolution),
+        lambda image: image.convert("RGB"),
+        transforms.ToTensor(),
+        transforms.Normalize((0.48145466, 0.4578275, 0.40821073), (0.26862954, 0.26130258, 0.27577711)),
+    ])
+    return TinyClip(), preprocess
+
+
+class StubChatModel:
+    """
+    实现 MiniCPM-V chat 接口的替身：msgs 为单段对话时返回一个答案，为对话列表时返回答案列表
+    latency 为每段对话模拟的生成耗时（秒），默认 0 只测量流水线本身的开销
+    """
+
+    def __init__(self, latency=0.0, answer_words=40, seed=0):
+        self.latency = latency
+        self.answer_words = answer_words
+        self.rng = random.Random(seed)
+
+    def _answer(self, msgs):
+        image, question = msgs[0]["content"]
+        words = self.rng.choices(_WORDS, cum_weights=_CUM_WEIGHTS, k=self.answer_words)
+        return f"The {question.split()[-3]} of this {image.size[0]}x{image.size[1]} painting shows " + " ".join(words)
+
+    def chat(self, image, msgs, tokenizer, **kwargs):
+        batched = bool(msgs) and isinstance(msgs[0], list)
+        conversations = msgs if batched else [msgs]
+        if self.latency:
+            time.sleep(self.latency * len(conversations))
+        answers = [self._answer(conversation) for conversation in conversations]
+        return answers if batched else answers[0]
+
+
+# ---------------------------------------------------------------------------
+# 各入口的基准定义：接收数据集与重复次数，返回 (单位, 所有调用合计处理的数量, 可调用对象列表)
+# ---------------------------------------------------------------------------
+
+def _per_text(function_name, module_loader):
+    def setup(dataset, repeat):
+        function = getattr(module_loader(), function_name)
+        texts = load_texts(dataset["json_path"])
+        return "texts", len(texts), [partial(function, text) for text in texts]
+    return setup
+
+
+def _per_file(function_name, module_loader, *args, **kwargs):
+    def setup(dataset, repeat):
+        function = getattr(module_loader(), function_name)
+        call = partial(function, dataset["json_path"], *args, **kwargs)
+        return "entries", dataset["entries"] * repeat, [call] * repeat
+    return setup
+
+
+def _ttr():
+    return _load_script("TTR", "TTR.py")
+
+
+def _mtld():
+    return _load_script("MTLD", "MTLD.py")
+
+
+def _entropy():
+    return _load_script("shannon_entropy", "Shannon entropy.py")
+
+
+def _lexical_metrics():
+    import lexical_metrics
+    return lexical_metrics
+
+
+def _setup_mtld_batch(dataset, repeat):
+    from MTLD import calculate_mtld_batch
+    texts = load_texts(dataset["json_path"])
+    return "texts", len(texts) * repeat, [partial(calculate_mtld_batch, texts)] * repeat
+
+
+def _setup_corpus_metrics(dataset, repeat):
+    from lexical_metrics import process_corpus_metrics
+    call = partial(process_corpus_metrics, dataset["json_path"])
+    return "entries", dataset["entries"] * repeat, [call] * repeat
+
+
+def _setup_matrix_metrics(dataset, repeat):
+    from sparse_metrics import process_json_matrix_metrics
+    store_dir = os.path.join(dataset["work_dir"], "corpus_store")
+    call = partial(process_json_matrix_metrics, dataset["json_path"], store_dir)
+    return "entries", dataset["entries"] * repeat, [call] * repeat
+
+
+def _setup_incremental(dataset, repeat):
+    from incremental_metrics import process_json_metrics_incremental
+    db_path = os.path.join(dataset["work_dir"], "metrics.sqlite")
+    if os.path.exists(db_path):
+        os.remove(db_path)
+    # 第一次调用为全量计算，之后文件未变化，测量的是无变化时的复查开销
+    call = partial(process_json_metrics_incremental, dataset["json_path"], db_path)
+    return "entries", dataset["entries"] * repeat, [call] * repeat
+
+
+def _setup_clip_score(dataset, repeat, batch_size=32):
+    from clip_score import calculate_clip_score, register_clip_model
+    model_path = os.path.join(dataset["work_dir"], "tiny_clip")
+    register_clip_model(*build_tiny_clip(), download_root=model_path)
+    pairs = load_pairs(dataset)
+    calls = []
+    for start in range(0, len(pairs), batch_size):
+        images, texts = zip(*pairs[start:start + batch_size])
+        calls.append(partial(calculate_clip_score, list(images), list(texts), model_path))
+    return "pairs", len(pairs), calls
+
+
+def _setup_clip_streaming(dataset, repeat):
+    from clip_score import calculate_clip_score_streaming, register_clip_model
+    model_path = os.path.join(dataset["work_dir"], "tiny_clip")
+    register_clip_model(*build_tiny_clip(), download_root=model_path)
+    pairs = load_pairs(dataset)
+    call = partial(calculate_clip_score_streaming, pairs, model_path, 64, num_workers=4)
+    return "pairs", len(pairs) * repeat, [call] * repeat
+
+
+def _setup_attributes(dataset, repeat, batch_size=None):
+    from attributes_alignments import process_all_images
+    output_dir = os.path.join(dataset["work_dir"], f"attributes_{batch_size}")
+    call = partial(process_all_images, dataset["image_root"], output_dir, batch_size,
+                   model=StubChatModel(), tokenizer=None, resume=False)
+    return "images", len(dataset["image_paths"]) * repeat, [call] * repeat
+
+
+BENCHMARKS = {
+    "calculate_ttr": _per_text("calculate_ttr", _ttr),
+    "calculate_shannon_entropy": _per_text("calculate_shannon_entropy", _entropy),
+    "calculate_mtld": _per_text("calculate_mtld", _mtld),
+    "calculate_mtld_batch": _setup_mtld_batch,
+    "process_json_ttr": _per_file("process_json_ttr", _ttr),
+    "process_json_entropy": _per_file("process_json_entropy", _entropy),
+    "process_json_mtld": _per_file("process_json_mtld", _mtld),
+    "process_json_metrics": _per_file("process_json_metrics", _lexical_metrics),
+    "process_corpus_metrics": _setup_corpus_metrics,
+    "process_json_matrix_metrics": _setup_matrix_metrics,
+    "process_json_metrics_incremental": _setup_incremental,
+    "calculate_clip_score": _setup_clip_score,
+    "calculate_clip_score_streaming": _setup_clip_streaming,
+    "process_all_images": _setup_attributes,
+    "process_all_images_batched": partial(_setup_attributes, batch_size=16),
+}
+
+
+def _peak_rss_mb(who="self"):
+    """本进程（self）或已回收子进程中最大的一个（children）的RSS峰值"""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF if who == "self" else resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux 以 KB 为单位，macOS 以字节为单位
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+def _reset_peak_rss():
+    """把本进程的RSS峰值重置为当前值（Linux），使之后的峰值不含数据准备；不支持时返回 False"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _clear_caches():
+    """每次计时调用前清空进程内的分词缓存，避免重复调用命中上一轮的结果"""
+    DEFAULT_TOKENIZER.cache_clear()
+
+
+def run_benchmark(name, dataset, repeat=3):
+    """
+    在当前进程中运行一个基准：先逐次计时（不开启 tracemalloc），再单独跟踪一次调用的 Python 内存峰值
+
+    每次调用前清空分词缓存；第一次调用还要建立入口自己的磁盘产物（语料存储、增量数据库等），
+    因此另外报告第一次调用（冷）的耗时和其余调用（热）的吞吐量
+
+    返回:
+        dict: name, entries, unit, items, calls, seconds, throughput, cold_ms, warm_throughput,
+              latency_ms {p50, p90, p99, max}, python_peak_mb,
+              peak_rss_mb（本进程RSS峰值 + 最大子进程RSS峰值，Windows上为 None），
+              self_peak_rss_mb, children_peak_rss_mb,
+              rss_includes_setup（无法重置峰值时为 True，本进程峰值包含读取数据和构建模型）
+    """
+    unit, items, calls = BENCHMARKS[name](dataset, repeat)
+    rss_reset = _reset_peak_rss()
+    # 各入口会打印警告和进度条，基准中丢弃
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull), redirect_stderr(devnull):
+        latencies = []
+        for call in calls:
+            _clear_caches()
+            start = time.perf_counter()
+            call()
+            latencies.append(time.perf_counter() - start)
+
+        _clear_caches()
+        tracemalloc.start()
+        try:
+            calls[0]()
+            _, python_peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    latencies = np.asarray(latencies)
+    seconds = float(latencies.sum())
+    p50, p90, p99 = np.percentile(latencies, [50, 90, 99]) * 1000
+    warm_seconds = float(latencies[1:].sum())
+    warm_items = items * (len(calls) - 1) / len(calls)
+    self_rss, children_rss = _peak_rss_mb("self"), _peak_rss_mb("children")
+    return {
+        "name": name,
+        "entries": dataset["entries"],
+        "unit": unit,
+        "items": items,
+        "calls": len(calls),
+        "seconds": seconds,
+        "throughput": items / seconds if seconds > 0 else float("inf"),
+        "cold_ms": float(latencies[0] * 1000),
+        "warm_throughput": warm_items / warm_seconds if warm_seconds > 0 else None,
+        "latency_ms": {"p50": float(p50), "p90": float(p90), "p99": float(p99),
+                       "max": float(latencies.max() * 1000)},
+        "python_peak_mb": python_peak / (1 << 20),
+        "peak_rss_mb": self_rss + children_rss if self_rss is not None else None,
+        "self_peak_rss_mb": self_rss,
+        "children_peak_rss_mb": children_rss,
+        "rss_includes_setup": not rss_reset,
+    }
+
+
+def _run_isolated(name, dataset, repeat):
+    """每个基准在独立的新进程中运行，互不共享模型缓存、分词缓存和内存峰值"""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_benchmark, name, dataset, repeat).result()
+
+
+def environment_info():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "processor": platform.processor(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def run_suite(scales=DEFAULT_SCALES, names=None, data_dir=DEFAULT_DATA_DIR, repeat=3, max_images=500, seed=0,
+              output_path=None):
+    """
+    对每个规模生成（或复用）合成数据集，逐个运行基准，结果写入 output_path
+
+    缺少可选依赖（clip、transformers 等）或运行失败的入口记录为 skipped 及原因，不影响其余基准；
+    运行失败的入口另外标记 failed，命令行据此以非零状态退出
+    """
+    names = list(names or BENCHMARKS)
+    report = {"environment": environment_info(),
+              "config": {"scales": list(scales), "repeat": repeat, "max_images": max_images, "seed": seed},
+              "results": []}
+    for num_entries in scales:
+        dataset = prepare_dataset(data_dir, num_entries, max_images, seed)
+        for name in names:
+            try:
+                result = _run_isolated(name, dataset, repeat)
+            except ImportError as e:
+                result = {"name": name, "entries": num_entries, "skipped": f"缺少依赖: {e}"}
+            except Exception as e:
+                result = {"name": name, "entries": num_entries, "skipped": f"运行失败: {e!r}", "failed": True}
+            report["results"].append(result)
+            print(format_result(result))
+            if output_path:
+                with open(output_path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2, ensure_ascii=False)
+    return report
+
+
+def format_result(result):
+    if "skipped" in result:
+        return f"{result['name']:<34} n={result['entries']:<7} skipped ({result['skipped']})"
+    latency = result["latency_ms"]
+    rss = f"{result['peak_rss_mb']:.0f}MB" if result["peak_rss_mb"] is not None else "n/a"
+    warm = f"{result['warm_throughput']:,.1f}" if result["warm_throughput"] is not None else "n/a"
+    return (f"{result['name']:<34} n={result['entries']:<7} {result['throughput']:>12,.1f} {result['unit']}/s  "
+            f"冷 {result['cold_ms']:.1f}ms 热 {warm}/s  "
+            f"p50 {latency['p50']:.3f}ms p99 {latency['p99']:.3f}ms  "
+            f"py峰值 {result['python_peak_mb']:.1f}MB rss {rss}")
+
+
+def compare_reports(baseline_path, current, tolerance=0.1):
+    """
+    与之前保存的结果逐项比较吞吐量，返回 [(入口, 规模, 当前/基线)]；低于 1 - tolerance 的标记为回退
+    """
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["name"], r["entries"]): r for r in json.load(f)["results"] if "skipped" not in r}
+    ratios = []
+    for result in current["results"]:
+        key = (result["name"], result["entries"])
+        if "skipped" in result or key not in baseline:
+            continue
+        ratio = result["throughput"] / baseline[key]["throughput"]
+        ratios.append((*key, ratio))
+        flag = "  <-- 回退" if ratio < 1 - tolerance else ""
+        print(f"{key[0]:<34} n={key[1]:<7} {ratio:6.2f}x{flag}")
+    return ratios
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the metric and pipeline entry points on synthetic data")
+    parser.add_argument("--scales", default=",".join(map(str, DEFAULT_SCALES)),
+                        help="comma-separated entry counts, e.g. 1000,10000,130000")
+    parser.add_argument("--only", default=None, help="comma-separated benchmark names (default: all)")
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    parser.add_argument("--data-dir", default=DEFAULT_DATA_DIR,
+                        help="where synthetic datasets are generated and reused (default: system temp dir)")
+    parser.add_argument("--repeat", type=int, default=3, help="calls per file-level entry point")
+    parser.add_argument("--max-images", type=int, default=500, help="synthetic PNGs per scale (CLIP / attributes)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--compare", default=None, metavar="BASELINE_JSON",
+                        help="compare throughput against an earlier results file")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.list:
+        print("\n".join(BENCHMARKS))
+        sys.exit(0)
+    report = run_suite(
+        scales=[int(scale) for scale in args.scales.split(",")],
+        names=args.only.split(",") if args.only else None,
+        data_dir=args.data_dir,
+        repeat=args.repeat,
+        max_images=args.max_images,
+        seed=args.seed,
+        output_path=args.output,
+    )
+    print(f"结果已保存到 {args.output}")
+    if args.compare:
+        compare_reports(args.compare, report)
+    failed = sorted({result["name"] for result in report["results"] if result.get("failed")})
+    if failed:
+        print(f"错误: 以下基准运行失败: {', '.join(failed)}")
+        sys.exit(1)
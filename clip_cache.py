@@ -0,0 +1,196 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+
+def hash_text(text):
+    """文本内容的SHA-256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """文件内容的SHA-256"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class FeatureCache:
+    """
+    CLIP图像/文本特征的持久化磁盘缓存
+    特征以float16写入固定行数的内存映射numpy分片，SQLite索引记录 键 → (分片, 行)
+    图像键为文件内容哈希，文本键为文本哈希；每个模型使用独立的子目录
+    超出max_bytes时按最近访问时间整片淘汰
+    参数:
+    cache_dir: 缓存根目录
+    model_id: 模型标识，如 "ViT-B/32"
+    shard_rows: 每个分片的行数
+    max_bytes: 分片文件总大小上限（字节）
+    """
+
+    def __init__(self, cache_dir, model_id, shard_rows=4096, max_bytes=2 << 30):
+        self.model_id = model_id
+        self.directory = os.path.join(cache_dir, re.sub(r"[^A-Za-z0-9_.-]+", "_", model_id))
+        self.shard_rows = shard_rows
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._shards = {}  # 已打开的分片内存映射
+        self._db = sqlite3.connect(os.path.join(self.directory, "index.sqlite"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS features (key TEXT PRIMARY KEY, shard INTEGER, row INTEGER);
+            CREATE TABLE IF NOT EXISTS shards (shard INTEGER PRIMARY KEY, dim INTEGER,
+                                               rows_used INTEGER, last_access REAL);
+            CREATE TABLE IF NOT EXISTS file_hashes (path TEXT PRIMARY KEY, size INTEGER,
+                                                    mtime_ns INTEGER, sha TEXT);
+            CREATE INDEX IF NOT EXISTS features_shard ON features (shard);
+        """)
+        self._db.commit()
+
+    def close(self):
+        with self._lock:
+            self._shards.clear()
+            self._db.close()
+
+    # ---- 键 ----
+
+    def image_key(self, path):
+        """图像键：文件内容哈希；按 (路径, 大小, 修改时间) 记住已算过的哈希，避免重复读文件"""
+        stat = os.stat(path)
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self._db.execute("SELECT size, mtime_ns, sha FROM file_hashes WHERE path = ?",
+                                   (path,)).fetchone()
+        if row and row[0] == stat.st_size and row[1] == stat.st_mtime_ns:
+            return "image:" + row[2]
+
+        sha = hash_file(path)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO file_hashes VALUES (?, ?, ?, ?)",
+                             (path, stat.st_size, stat.st_mtime_ns, sha))
+            self._db.commit()
+        return "image:" + sha
+
+    @staticmethod
+    def text_key(text):
+        return "text:" + hash_text(text)
+
+    # ---- 读写 ----
+
+    def _shard_path(self, shard):
+        return os.path.join(self.directory, f"shard_{shard:06d}.npy")
+
+    def _open_shard(self, shard, dim=None):
+        if shard not in self._shards:
+            path = self._shard_path(shard)
+            if dim is not None and not os.path.exists(path):
+                self._shards[shard] = np.lib.format.open_memmap(path, mode="w+", dtype=np.float16,
+                                                                shape=(self.shard_rows, dim))
+            else:
+                self._shards[shard] = np.load(path, mmap_mode="r+")
+        return self._shards[shard]
+
+    def get_many(self, keys):
+        """
+        批量查询特征
+        返回:
+        dict: 命中的 键 → float32特征向量
+        """
+        found = {}
+        with self._lock:
+            locations = {}
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                for key, shard, row in self._db.execute(
+                        f"SELECT key, shard, row FROM features WHERE key IN ({placeholders})", chunk):
+                    locations[key] = (shard, row)
+
+            now = time.time()
+            for key, (shard, row) in locations.items():
+                found[key] = np.asarray(self._open_shard(shard)[row], dtype=np.float32)
+            if locations:
+                touched = {shard for shard, _ in locations.values()}
+                self._db.executemany("UPDATE shards SET last_access = ? WHERE shard = ?",
+                                     [(now, shard) for shard in touched])
+                self._db.commit()
+        return found
+
+    def contains_many(self, keys):
+        """返回已缓存的键集合（只查索引，不读取特征，也不更新访问时间）"""
+        present = set()
+        with self._lock:
+            unique_keys = list(dict.fromkeys(keys))
+            for start in range(0, len(unique_keys), 500):
+                chunk = unique_keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                present.update(key for key, in self._db.execute(
+                    f"SELECT key FROM features WHERE key IN ({placeholders})", chunk))
+        return present
+
+    def put_many(self, keys, features):
+        """
+        批量写入特征
+        参数:
+        keys: 键列表
+        features: 与keys等长的二维数组 [N, D]
+        """
+        features = np.asarray(features, dtype=np.float16)
+        with self._lock:
+            dim = features.shape[1]
+            now = time.time()
+            for key, feature in zip(keys, features):
+                if self._db.execute("SELECT 1 FROM features WHERE key = ?", (key,)).fetchone():
+                    continue
+                shard, row = self._allocate_row(dim, now)
+                self._open_shard(shard, dim)[row] = feature
+                self._db.execute("INSERT INTO features VALUES (?, ?, ?)", (key, shard, row))
+            for memmap in self._shards.values():
+                memmap.flush()
+            self._evict()
+            self._db.commit()
+
+    def _allocate_row(self, dim, now):
+        current = self._db.execute("SELECT shard, rows_used FROM shards WHERE dim = ? ORDER BY shard DESC LIMIT 1",
+                                   (dim,)).fetchone()
+        if current is None or current[1] >= self.shard_rows:
+            last = self._db.execute("SELECT MAX(shard) FROM shards").fetchone()[0]
+            shard = 0 if last is None else last + 1
+            self._db.execute("INSERT INTO shards VALUES (?, ?, 0, ?)", (shard, dim, now))
+            row = 0
+        else:
+            shard, row = current
+        self._db.execute("UPDATE shards SET rows_used = ?, last_access = ? WHERE shard = ?", (row + 1, now, shard))
+        return shard, row
+
+    def _evict(self):
+        """总大小超过上限时，按最近访问时间淘汰最旧的整片（正在写入的最新分片除外）"""
+        shards = self._db.execute("SELECT shard, dim FROM shards ORDER BY last_access").fetchall()
+        total = sum(self.shard_rows * dim * 2 for _, dim in shards)
+        newest = max((shard for shard, _ in shards), default=None)
+        for shard, dim in shards:
+            if total <= self.max_bytes:
+                break
+            if shard == newest:
+                continue
+            self._db.execute("DELETE FROM features WHERE shard = ?", (shard,))
+            self._db.execute("DELETE FROM shards WHERE shard = ?", (shard,))
+            self._shards.pop(shard, None)
+            try:
+                os.remove(self._shard_path(shard))
+            except FileNotFoundError:
+                pass
+            total -= self.shard_rows * dim * 2
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM features").fetchone()[0]
\ No newline at end of file
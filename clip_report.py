@@ -0,0 +1,197 @@
+import csv
+import json
+import os
+from PIL import UnidentifiedImageError
+from annotation_stream import iter_json_entries
+from clip_cache import FeatureCache
+from clip_score import ClipScorer, batched
+
+# 报告的列；分组统计使用其中的类别列
+REPORT_COLUMNS = ["request_id", "image_path", "style", "dominant_emotion", "emotional_valence", "clip_score"]
+GROUP_COLUMNS = ["style", "dominant_emotion", "emotional_valence"]
+
+# 每次交给流式打分的批次数；窗口内有图像无法读取时只需逐对重试这一个窗口
+REPORT_WINDOW_BATCHES = 16
+
+
+def iter_annotation_pairs(json_file_path, image_root):
+    """
+    从标注JSON中逐条产出 (图像完整路径, 描述文本, 元数据)
+    元数据包含request_id、相对图像路径、画风文件夹、主导情绪和情感效价
+    """
+    for entry in iter_json_entries(json_file_path):
+        try:
+            image_path = entry['image_path']
+            text = entry['description']['first_section']['description']
+        except KeyError as e:
+            print(f"警告: 条目缺少字段 {e}，跳过该条目")
+            continue
+        third_section = entry['description'].get('third_section', {})
+        parts = image_path.replace('\\', '/').split('/')
+        yield os.path.join(image_root, image_path), text, {
+            'request_id': entry.get('request_id', ''),
+            'image_path': image_path,
+            'style': parts[0] if len(parts) > 1 else '',
+            'dominant_emotion': third_section.get('dominant_emotion', ''),
+            'emotional_valence': third_section.get('emotional_valence', ''),
+        }
+
+
+class GroupedScoreStats:
+    """按类别分组的常量内存分数统计（数量、均值、最小值、最大值）"""
+
+    def __init__(self, group_columns=GROUP_COLUMNS):
+        self.group_columns = list(group_columns)
+        self.overall = self._empty()
+        self.groups = {column: {} for column in self.group_columns}
+
+    @staticmethod
+    def _empty():
+        return {'count': 0, 'mean': 0.0, 'min': float('inf'), 'max': float('-inf')}
+
+    @staticmethod
+    def _update(stats, score):
+        stats['count'] += 1
+        stats['mean'] += (score - stats['mean']) / stats['count']
+        stats['min'] = min(stats['min'], score)
+        stats['max'] = max(stats['max'], score)
+
+    def add(self, row):
+        score = row['clip_score']
+        self._update(self.overall, score)
+        for column in self.group_columns:
+            group = self.groups[column].setdefault(str(row.get(column, '')), self._empty())
+            self._update(group, score)
+
+    @staticmethod
+    def _finalize(stats):
+        # 没有任何分数时均值和极值写成 null，保证输出为合法JSON
+        if not stats['count']:
+            return {'count': 0, 'mean': None, 'min': None, 'max': None}
+        return dict(stats)
+
+    def summary(self):
+        return {'overall': self._finalize(self.overall),
+                **{column: {name: self._finalize(stats) for name, stats in groups.items()}
+                   for column, groups in self.groups.items()}}
+
+
+class ScoreReportWriter:
+    """
+    逐批追加写入每对图文的分数行
+    .parquet 后缀写Parquet（需要pyarrow，按行组增量写入），其余写CSV
+    """
+
+    def __init__(self, output_path, columns=REPORT_COLUMNS):
+        self.output_path = output_path
+        self.columns = list(columns)
+        self._parquet = output_path.lower().endswith('.parquet')
+        if self._parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            self._pa = pa
+            schema = pa.schema([(column, pa.float64() if column == 'clip_score' else pa.string())
+                                for column in self.columns])
+            self._writer = pq.ParquetWriter(output_path, schema)
+        else:
+            self._file = open(output_path, 'w', encoding='utf-8', newline='')
+            self._writer = csv.DictWriter(self._file, fieldnames=self.columns)
+            self._writer.writeheader()
+
+    def write_rows(self, rows):
+        if not rows:
+            return
+        if self._parquet:
+            table = self._pa.table({column: [row[column] for row in rows] for column in self.columns})
+            self._writer.write_table(table)
+        else:
+            self._writer.writerows(rows)
+            self._file.flush()
+
+    def close(self):
+        if self._parquet:
+            self._writer.close()
+        else:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def score_window(scorer, window, batch_size=64, num_workers=0):
+    """
+    对一个窗口的 (图像路径, 文本, 元数据) 打分，返回 [(元数据, 分数)]
+    窗口中有图像缺失或无法读取时逐对重试，跳过失败的条目并打印错误
+    """
+    pairs = [(image, text) for image, text, _ in window]
+    try:
+        scores = [score for _, _, score in scorer.iter_scores(pairs, batch_size, num_workers=num_workers)]
+        return [(meta, score) for (_, _, meta), score in zip(window, scores)]
+    except (OSError, UnidentifiedImageError):
+        pass
+
+    results = []
+    for image, text, meta in window:
+        try:
+            results.append((meta, float(scorer.score([image], [text])[0])))
+        except (OSError, UnidentifiedImageError) as e:
+            print(f"错误: 无法读取图像 {image}（{e}），跳过该条目")
+    return results
+
+
+def write_clip_score_report(json_file_path, image_root, output_path, model_path="./clip_model", batch_size=64,
+                            num_workers=0, cache_dir=None, summary_path=None):
+    """
+    对标注JSON中的每对图文计算CLIP Score，逐批写入列式报告，并按画风、主导情绪、情感效价分组统计
+    参数:
+    json_file_path: 标注JSON文件路径
+    image_root: 图像根目录（与条目中的image_path拼接）
+    output_path: 每对分数的输出文件（.csv 或 .parquet）
+    model_path: 预训练模型保存路径
+    batch_size: 每批编码的图文对数量
+    num_workers: 图像解码/预处理的工作线程数
+    cache_dir: 可选的特征缓存目录
+    summary_path: 可选，分组统计结果的JSON输出路径
+    返回:
+    dict: 总体及各分组的数量、均值、最小值、最大值（没有分数时均值和极值为 None）
+    """
+    feature_cache = FeatureCache(cache_dir, "ViT-B/32") if cache_dir else None
+    scorer = ClipScorer(model_path, feature_cache=feature_cache)
+    stats = GroupedScoreStats()
+
+    # 按窗口流式打分（窗口内预取与编码重叠），内存只与窗口大小有关
+    windows = batched(iter_annotation_pairs(json_file_path, image_root), batch_size * REPORT_WINDOW_BATCHES)
+    with ScoreReportWriter(output_path) as writer:
+        for window in windows:
+            rows = []
+            for meta, score in score_window(scorer, window, batch_size, num_workers):
+                row = {**meta, 'clip_score': score}
+                stats.add(row)
+                rows.append(row)
+            writer.write_rows(rows)
+
+    summary = stats.summary()
+    if summary_path:
+        with open(summary_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False, allow_nan=False)
+    return summary
+
+
+if __name__ == "__main__":
+    summary = write_clip_score_report(
+        json_file_path=r"E:\Annotation\Abstract Art.json",
+        image_root=r"E:\EmoArt",
+        output_path="clip_scores.csv",
+        summary_path="clip_scores_summary.json"
+    )
+    if not summary['overall']['count']:
+        print("错误: 没有可计算CLIP Score的图文对")
+        raise SystemExit(1)
+    print(f"CLIP Score: {summary['overall']['mean']:.2f} ({summary['overall']['count']} pairs)")
+    for column in GROUP_COLUMNS:
+        print(f"按 {column} 分组:")
+        for name, group in sorted(summary[column].items(), key=lambda item: item[1]['mean']):
+            print(f"  {name}: {group['mean']:.2f} (n={group['count']})")
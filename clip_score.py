@@ -2,56 +2,456 @@ import torch
 from PIL import Image
 import clip
 from torchvision import transforms
+from clip_cache import FeatureCache
+from metric_stats import RunningStats
 import os
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from functools import partial
+from itertools import islice
 
-def calculate_clip_score(images, texts, model_path="./clip_model"):
+# 进程级模型缓存：键为 (模型名, 设备, 下载路径)，同一进程内每个组合只加载一次
+_MODEL_CACHE = {}
+_MODEL_CACHE_LOCK = threading.Lock()
+
+
+def default_device():
+    """返回默认计算设备"""
+    return "cuda" if torch.cuda.is_available() else "cpu"
+
+
+def load_clip_model(model_name="ViT-B/32", device=None, download_root="./clip_model"):
     """
-    计算图像和文本之间的CLIP Score
+    加载CLIP模型并缓存，重复调用直接返回已加载的模型
     参数:
-    images: 图像路径列表或单张图像路径
-    texts: 文本描述列表或单个文本
-    model_path: 预训练模型保存路径
+    model_name: CLIP模型名称
+    device: 计算设备，默认自动选择
+    download_root: 预训练模型保存路径
+    返回:
+    (model, preprocess)
+    """
+    if device is None:
+        device = default_device()
+    key = (model_name, str(device), os.path.abspath(download_root))
+
+    with _MODEL_CACHE_LOCK:
+        if key not in _MODEL_CACHE:
+            # 确保模型路径存在
+            os.makedirs(download_root, exist_ok=True)
+            model, preprocess = clip.load(model_name, device=device, download_root=download_root)
+            model.eval()
+            _MODEL_CACHE[key] = (model, preprocess)
+        return _MODEL_CACHE[key]
+
+
+def register_clip_model(model, preprocess, model_name="ViT-B/32", device=None, download_root="./clip_model"):
+    """
+    把已构建的模型放入缓存（如基准测试使用的小型替身模型），之后相同参数的load_clip_model直接返回它
     """
-    # 确保模型路径存在
-    if not os.path.exists(model_path):
-        os.makedirs(model_path)
+    if device is None:
+        device = default_device()
+    key = (model_name, str(device), os.path.abspath(download_root))
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE[key] = (model.eval(), preprocess)
+
+
+def clear_model_cache():
+    """释放所有已缓存的CLIP模型"""
+    with _MODEL_CACHE_LOCK:
+        _MODEL_CACHE.clear()
+
+
+def batched(iterable, batch_size):
+    """将任意可迭代对象按固定大小切分为批次，不预先读取全部元素"""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def preprocess_image(preprocess, image):
+    """读取并预处理单张图像（路径或PIL图像）"""
+    if isinstance(image, str):
+        image = Image.open(image)
+    return preprocess(image.convert("RGB"))
+
+
+# 进程池工作进程内的预处理函数，由initializer设置一次，避免每个任务重复序列化
+_WORKER_PREPROCESS = None
+
 
-    # 加载CLIP模型（指定下载路径）
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model, preprocess = clip.load("ViT-B/32", device=device, download_root=model_path)
+def _init_preprocess_worker(preprocess):
+    global _WORKER_PREPROCESS
+    _WORKER_PREPROCESS = preprocess
 
-    # 处理输入格式
-    if isinstance(images, str):
-        images = [images]
-    if isinstance(texts, str):
-        texts = [texts]
 
-    # 预处理图像
-    image_tensors = []
-    for image_path in images:
-        image = Image.open(image_path).convert("RGB")
-        image_tensor = preprocess(image).unsqueeze(0).to(device)
-        image_tensors.append(image_tensor)
-    image_tensors = torch.cat(image_tensors)
+def _preprocess_in_worker(image):
+    return preprocess_image(_WORKER_PREPROCESS, image)
 
-    # 预处理文本
-    text_tokens = clip.tokenize(texts).to(device)
 
-    # 计算特征
+def make_preprocess_pool(preprocess, num_workers, executor="thread"):
+    """
+    创建图像解码/预处理工作池
+    返回:
+    (执行器, 接收单张图像的预处理任务函数)
+    """
+    if executor == "process":
+        pool = ProcessPoolExecutor(max_workers=num_workers,
+                                   initializer=_init_preprocess_worker,
+                                   initargs=(preprocess,))
+        return pool, _preprocess_in_worker
+    if executor == "thread":
+        return ThreadPoolExecutor(max_workers=num_workers), partial(preprocess_image, preprocess)
+    raise ValueError(f"executor必须是'thread'或'process'，当前为{executor!r}")
+
+
+def paired_similarity(image_features, text_features):
+    """
+    计算一一对应图文特征的余弦相似度（逐行点积），只需O(N)而非完整N×N矩阵
+    参数:
+    image_features: 归一化图像特征 [N, D]
+    text_features: 归一化文本特征 [N, D]
+    返回:
+    torch.Tensor: [N]，乘以100得到百分比形式
+    """
+    if image_features.shape != text_features.shape:
+        raise ValueError(f"图像特征{tuple(image_features.shape)}与文本特征{tuple(text_features.shape)}数量不一致")
+    return (image_features * text_features).sum(dim=-1) * 100
+
+
+def retrieval_recall_at_k(image_features, text_features, ks=(1, 5, 10), block_size=1024):
+    """
+    全配对模式：分块计算图像→文本相似度矩阵，统计recall@k，不一次性构造N×N矩阵
+    第i张图像的正确文本为第i条文本
+    参数:
+    image_features: 归一化图像特征 [N, D]
+    text_features: 归一化文本特征 [M, D]
+    ks: 需要统计的k值
+    block_size: 每块的图像行数与文本列数
+    返回:
+    dict: {k: recall@k}
+    """
+    num_images = image_features.shape[0]
+    num_texts = text_features.shape[0]
+    max_k = min(max(ks), num_texts)
+    hits = {k: 0 for k in ks}
+
     with torch.no_grad():
-        image_features = model.encode_image(image_tensors)
-        text_features = model.encode_text(text_tokens)
+        for row_start in range(0, num_images, block_size):
+            image_block = image_features[row_start:row_start + block_size]
+            rows = image_block.shape[0]
+            # 每行维护当前的前max_k个分数及对应文本下标，逐列块合并
+            top_scores = torch.empty(rows, 0, device=image_block.device, dtype=image_block.dtype)
+            top_indices = torch.empty(rows, 0, device=image_block.device, dtype=torch.long)
+            for col_start in range(0, num_texts, block_size):
+                text_block = text_features[col_start:col_start + block_size]
+                block_scores = image_block @ text_block.T
+                block_indices = torch.arange(col_start, col_start + text_block.shape[0],
+                                             device=image_block.device).expand(rows, -1)
+                merged_scores = torch.cat([top_scores, block_scores], dim=1)
+                merged_indices = torch.cat([top_indices, block_indices], dim=1)
+                top_scores, order = merged_scores.topk(min(max_k, merged_scores.shape[1]), dim=1)
+                top_indices = merged_indices.gather(1, order)
+
+            targets = torch.arange(row_start, row_start + rows, device=image_block.device).unsqueeze(1)
+            matches = top_indices == targets
+            for k in ks:
+                hits[k] += int(matches[:, :k].any(dim=1).sum())
+
+    return {k: hits[k] / num_images if num_images else 0.0 for k in ks}
+
+
+class PrefetchLoader:
+    """
+    在线程池或进程池中并行解码、预处理图像，并把现成的批次交给编码器
+    最多同时预取max_prefetch个批次，解码与模型推理互相重叠
+    参数:
+    pairs: (图像路径, 文本) 的可迭代对象
+    preprocess: CLIP预处理函数
+    batch_size: 每批图文对数量
+    num_workers: 工作线程/进程数
+    executor: "thread" 或 "process"
+    max_prefetch: 有界预取队列的批次数上限
+    select: 可选，接收一批图像列表并返回其中需要解码的图像（例如特征缓存未命中的图像）；
+            提供时逐批产出 (已解码的 {id(图像): 张量}, 图像列表, 文本列表)
+    """
+
+    def __init__(self, pairs, preprocess, batch_size=64, num_workers=4, executor="thread", max_prefetch=2,
+                 select=None):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"executor必须是'thread'或'process'，当前为{executor!r}")
+        self.pairs = pairs
+        self.preprocess = preprocess
+        self.batch_size = batch_size
+        self.num_workers = num_workers
+        self.executor = executor
+        self.max_prefetch = max(1, max_prefetch)
+        self.select = select
 
-        # 归一化特征
-        image_features = image_features / image_features.norm(dim=-1, keepdim=True)
-        text_features = text_features / text_features.norm(dim=-1, keepdim=True)
+    def __iter__(self):
+        """逐批产出 (图像张量, 图像列表, 文本列表)；提供 select 时第一项为 {id(图像): 张量}"""
+        pool, task = make_preprocess_pool(self.preprocess, self.num_workers, self.executor)
+        pending = deque()
+        try:
+            for batch in batched(self.pairs, self.batch_size):
+                images = [image for image, _ in batch]
+                texts = [text for _, text in batch]
+                selected = images if self.select is None else self.select(images)
+                pending.append((images, texts, [(image, pool.submit(task, image)) for image in selected]))
+                # 队列已满时先交付最早的批次，其余批次继续在后台解码
+                if len(pending) >= self.max_prefetch:
+                    yield self._collect(pending.popleft())
+            while pending:
+                yield self._collect(pending.popleft())
+        finally:
+            for _, _, futures in pending:
+                for _, future in futures:
+                    future.cancel()
+            pool.shutdown(wait=True)
 
-        # 计算余弦相似度
-        similarity = (image_features @ text_features.T) * 100  # 乘以100得到百分比形式
+    def _collect(self, item):
+        images, texts, futures = item
+        if self.select is not None:
+            return {id(image): future.result() for image, future in futures}, images, texts
+        return torch.stack([future.result() for _, future in futures]), images, texts
 
-    # 返回平均CLIP Score
-    clip_scores = similarity.diag().cpu().numpy()
-    return clip_scores.mean() if len(clip_scores) > 1 else clip_scores.item()
+
+class ClipScorer:
+    """
+    持有一份已加载的CLIP模型，可对多批图像/文本重复打分
+    参数:
+    model_path: 预训练模型保存路径
+    model_name: CLIP模型名称
+    device: 计算设备，默认自动选择
+    feature_cache: 可选的clip_cache.FeatureCache，已缓存的图像/文本跳过编码
+    """
+
+    def __init__(self, model_path="./clip_model", model_name="ViT-B/32", device=None, feature_cache=None):
+        self.model_name = model_name
+        self.model_path = model_path
+        self.device = device if device is not None else default_device()
+        self.model, self.preprocess = load_clip_model(model_name, self.device, model_path)
+        self.feature_cache = feature_cache
+
+    def warmup(self):
+        """用一张空白图像和一条短文本跑一次前向，消除首个请求的冷启动开销"""
+        resolution = self.model.visual.input_resolution
+        image = Image.new("RGB", (resolution, resolution))
+        self.score([image], ["warmup"])
+        return self
+
+    def load_image(self, image):
+        """读取并预处理单张图像（路径或PIL图像）"""
+        return preprocess_image(self.preprocess, image)
+
+    def encode_images(self, images):
+        """计算归一化后的图像特征"""
+        return self.encode_image_tensors(torch.stack([self.load_image(image) for image in images]))
+
+    def encode_image_tensors(self, image_tensors):
+        """对已预处理的图像张量计算归一化特征"""
+        with torch.no_grad():
+            image_features = self.model.encode_image(image_tensors.to(self.device))
+        return image_features / image_features.norm(dim=-1, keepdim=True)
+
+    def encode_texts(self, texts):
+        """计算归一化后的文本特征；超出CLIP上下文长度（77个token）的文本截断处理"""
+        text_tokens = clip.tokenize(texts, truncate=True).to(self.device)
+        with torch.no_grad():
+            text_features = self.model.encode_text(text_tokens)
+        return text_features / text_features.norm(dim=-1, keepdim=True)
+
+    def score(self, images, texts):
+        """
+        计算一批图像与文本一一对应的CLIP Score
+        参数:
+        images: 图像路径/PIL图像列表或单张图像
+        texts: 文本描述列表或单个文本
+        返回:
+        numpy.ndarray: 每对图文的CLIP Score
+        """
+        # 处理输入格式
+        if isinstance(images, (str, Image.Image)):
+            images = [images]
+        if isinstance(texts, str):
+            texts = [texts]
+
+        if self.feature_cache is not None:
+            return self._score_cached(images, texts, lambda missing: [self.load_image(image) for image in missing])
+        return self.score_tensors(torch.stack([self.load_image(image) for image in images]), texts)
+
+    def score_tensors(self, image_tensors, texts):
+        """对已预处理的图像张量与文本计算一一对应的CLIP Score"""
+        image_features = self.encode_image_tensors(image_tensors)
+        text_features = self.encode_texts(texts)
+
+        return paired_similarity(image_features, text_features).cpu().numpy()
+
+    def _cached_features(self, items, keys, encode):
+        """
+        按键查询特征缓存，仅对未命中的条目调用encode并写回缓存
+        新编码的特征同样先转为缓存使用的float16再参与打分，保证分数与缓存是否命中无关
+        """
+        found = self.feature_cache.get_many([key for key in keys if key is not None])
+        missing = {}
+        for item, key in zip(items, keys):
+            if key is None or key not in found:
+                missing.setdefault(key if key is not None else id(item), item)
+        if missing:
+            encoded = encode(list(missing.values())).to(torch.float16)
+            fresh = dict(zip(missing.keys(), encoded))
+            cacheable = [key for key in missing if isinstance(key, str)]
+            if cacheable:
+                self.feature_cache.put_many(cacheable, torch.stack([fresh[key] for key in cacheable]).cpu().numpy())
+            found = {**{key: torch.from_numpy(value) for key, value in found.items()}, **fresh}
+        else:
+            found = {key: torch.from_numpy(value) for key, value in found.items()}
+        features = [found[key if key is not None else id(item)] for item, key in zip(items, keys)]
+        return torch.stack([feature.to(self.device, torch.float32) for feature in features])
+
+    def _score_cached(self, images, texts, decode):
+        """带特征缓存的打分；decode负责把未命中的图像转成预处理张量列表"""
+        cache = self.feature_cache
+        image_keys = [cache.image_key(image) if isinstance(image, str) else None for image in images]
+        text_keys = [cache.text_key(text) for text in texts]
+        image_features = self._cached_features(
+            images, image_keys, lambda missing: self.encode_image_tensors(torch.stack(decode(missing))))
+        text_features = self._cached_features(texts, text_keys, self.encode_texts)
+        return paired_similarity(image_features, text_features).cpu().numpy()
+
+    def encode_pairs(self, pairs, batch_size=64, num_workers=0, executor="thread"):
+        """流式编码所有图文对，返回拼接后的 (图像特征, 文本特征)，供全配对检索评估使用"""
+        image_features = []
+        text_features = []
+        for image_tensors, _, texts in self.iter_batches(pairs, batch_size, num_workers, executor):
+            image_features.append(self.encode_image_tensors(image_tensors))
+            text_features.append(self.encode_texts(texts))
+        return torch.cat(image_features), torch.cat(text_features)
+
+    def iter_batches(self, pairs, batch_size=64, num_workers=0, executor="thread", max_prefetch=2):
+        """按批产出 (图像张量, 图像列表, 文本列表)；num_workers>0 时在工作池中预取解码"""
+        if num_workers > 0:
+            yield from PrefetchLoader(pairs, self.preprocess, batch_size, num_workers, executor, max_prefetch)
+            return
+        for batch in batched(pairs, batch_size):
+            images = [image for image, _ in batch]
+            texts = [text for _, text in batch]
+            yield torch.stack([self.load_image(image) for image in images]), images, texts
+
+    def iter_scores(self, pairs, batch_size=64, running_stats=None, num_workers=0, executor="thread",
+                    max_prefetch=2):
+        """
+        流式计算CLIP Score，按固定批次编码，内存占用与数据集大小无关
+        参数:
+        pairs: (图像路径, 文本) 的可迭代对象，可以是生成器
+        batch_size: 每批编码的图文对数量
+        running_stats: 可选的metric_stats.RunningStats，随每批结果更新
+        num_workers: 图像解码/预处理的工作线程或进程数，0表示在主线程串行处理
+        executor: "thread" 或 "process"
+        max_prefetch: 预取队列中最多缓存的批次数
+        返回:
+        生成器，逐对产出 (图像路径, 文本, CLIP Score)
+        """
+        if self.feature_cache is not None:
+            yield from self._iter_cached_scores(pairs, batch_size, running_stats, num_workers, executor,
+                                                max_prefetch)
+            return
+        for image_tensors, images, texts in self.iter_batches(pairs, batch_size, num_workers, executor,
+                                                              max_prefetch):
+            scores = self.score_tensors(image_tensors, texts)
+            if running_stats is not None:
+                running_stats.update(scores.tolist())
+            for image, text, score in zip(images, texts, scores):
+                yield image, text, float(score)
+
+    def _uncached_images(self, images):
+        """一批图像中特征缓存未命中、需要解码的图像"""
+        keys = [self.feature_cache.image_key(image) if isinstance(image, str) else None for image in images]
+        present = self.feature_cache.contains_many([key for key in keys if key is not None])
+        return [image for image, key in zip(images, keys) if key is None or key not in present]
+
+    def _iter_cached_scores(self, pairs, batch_size, running_stats, num_workers, executor, max_prefetch=2):
+        """
+        带特征缓存的流式打分：只有未命中缓存的图像才会被解码
+        num_workers>0 时未命中的图像交给 PrefetchLoader 有界预取，解码与编码互相重叠
+        """
+        if num_workers > 0:
+            batches = PrefetchLoader(pairs, self.preprocess, batch_size, num_workers, executor, max_prefetch,
+                                     select=self._uncached_images)
+        else:
+            batches = (({}, [image for image, _ in batch], [text for _, text in batch])
+                       for batch in batched(pairs, batch_size))
+        for decoded, images, texts in batches:
+            # 预取之后才写入缓存的图像不会被预取，到这里再解码
+            decode = lambda missing: [decoded[id(image)] if id(image) in decoded else self.load_image(image)
+                                      for image in missing]
+            scores = self._score_cached(images, texts, decode)
+            if running_stats is not None:
+                running_stats.update(scores.tolist())
+            for image, text, score in zip(images, texts, scores):
+                yield image, text, float(score)
+
+
+def calculate_clip_score(images, texts, model_path="./clip_model", return_per_pair=False):
+    """
+    计算图像和文本之间的CLIP Score
+    参数:
+    images: 图像路径列表或单张图像路径
+    texts: 文本描述列表或单个文本
+    model_path: 预训练模型保存路径
+    return_per_pair: 为True时返回每对图文的分数向量而非平均值
+    """
+    # 模型在进程内只加载一次，重复调用复用缓存
+    scorer = ClipScorer(model_path)
+    clip_scores = scorer.score(images, texts)
+
+    if return_per_pair:
+        return clip_scores
+    # 返回平均CLIP Score（单对图文同样取均值，返回类型一致）
+    return float(clip_scores.mean())
+
+def calculate_clip_score_streaming(pairs, model_path="./clip_model", batch_size=64, num_workers=0,
+                                   executor="thread", cache_dir=None):
+    """
+    以流式小批次计算任意规模图文对的平均CLIP Score
+    参数:
+    pairs: (图像路径, 文本) 的可迭代对象
+    model_path: 预训练模型保存路径
+    batch_size: 每批编码的图文对数量
+    num_workers: 图像解码/预处理的工作线程或进程数
+    executor: "thread" 或 "process"
+    cache_dir: 特征缓存目录，提供时重复评估可跳过已编码的图像和文本
+    返回:
+    float: 平均CLIP Score
+    int: 图文对数量
+    """
+    feature_cache = FeatureCache(cache_dir, "ViT-B/32") if cache_dir else None
+    scorer = ClipScorer(model_path, feature_cache=feature_cache)
+    running_stats = RunningStats()
+    for _ in scorer.iter_scores(pairs, batch_size, running_stats, num_workers, executor):
+        pass
+    return running_stats.mean, running_stats.count
+
+def calculate_retrieval_recall(pairs, model_path="./clip_model", ks=(1, 5, 10), batch_size=64, block_size=1024,
+                               num_workers=0):
+    """
+    图像→文本检索评估：第i张图像以第i条描述为正确答案，分块计算recall@k
+    参数:
+    pairs: (图像路径, 文本) 的可迭代对象
+    model_path: 预训练模型保存路径
+    ks: 需要统计的k值
+    batch_size: 编码批次大小
+    block_size: 相似度矩阵分块大小
+    num_workers: 图像解码/预处理的工作线程数
+    返回:
+    dict: {k: recall@k}
+    """
+    scorer = ClipScorer(model_path)
+    image_features, text_features = scorer.encode_pairs(pairs, batch_size, num_workers)
+    return retrieval_recall_at_k(image_features, text_features, ks, block_size)
 
 # 使用示例
 if __name__ == "__main__":
@@ -62,6 +462,9 @@ if __name__ == "__main__":
     # 指定模型保存路径
     custom_model_path = "./clip_model"
 
+    # 预热模型，避免首次打分的冷启动延迟
+    scorer = ClipScorer(custom_model_path).warmup()
+
     # 计算CLIP Score
     score = calculate_clip_score(image_paths, text_descriptions, custom_model_path)
     print(f"CLIP Score: {score:.2f}")
\ No newline at end of file
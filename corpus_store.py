@@ -0,0 +1,208 @@
+import json
+import os
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from annotation_stream import iter_json_entries
+from lexical_metrics import ATTRIBUTE_FIELDS, FIELDS, compute_token_metrics, new_field_stats, summarize_field_stats
+from MTLD import mtld_batch_from_ids
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+# 存储目录中的文件
+VOCAB_FILE = 'vocab.json'
+TOKENS_FILE = 'tokens.u32'
+OFFSETS_FILE = 'offsets.npy'
+META_FILE = 'meta.json'
+
+# 分批写出词ID，构建时内存只保留一小段
+_FLUSH_TOKENS = 1 << 20
+
+
+class CorpusStore:
+    """
+    整数化的语料存储：全局词表 + 按顺序拼接的 uint32 词ID序列 + 每个 (条目, 字段) 的偏移区间
+
+    offsets 形状为 [条目数, 字段数, 2]，保存 [起点, 终点)；字段缺失（原脚本中因 KeyError 跳过）时为 -1。
+    词ID序列以内存映射方式打开，之后的指标计算无需再读取JSON或分词
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, META_FILE), 'r', encoding='utf-8') as f:
+            self.meta = json.load(f)
+        with open(os.path.join(directory, VOCAB_FILE), 'r', encoding='utf-8') as f:
+            self.vocabulary: List[str] = json.load(f)
+        token_path = os.path.join(directory, TOKENS_FILE)
+        if os.path.getsize(token_path):
+            self.tokens = np.memmap(token_path, dtype=np.uint32, mode='r')
+        else:
+            self.tokens = np.zeros(0, dtype=np.uint32)
+        self.offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode='r')
+        self.fields: List[str] = self.meta['fields']
+        self.request_ids: List[str] = self.meta['request_ids']
+
+    def __len__(self) -> int:
+        return self.offsets.shape[0]
+
+    def field_tokens(self, entry: int, field: str) -> Optional[np.ndarray]:
+        """返回某条目某字段的词ID数组（内存映射视图）；字段缺失时返回 None"""
+        start, end = self.offsets[entry, self.fields.index(field)]
+        if start < 0:
+            return None
+        return self.tokens[start:end]
+
+    def iter_field_tokens(self) -> Iterator[Tuple[str, np.ndarray]]:
+        """按原脚本的处理顺序逐个产出 (字段名, 词ID数组)，缺失的字段跳过"""
+        offsets = np.asarray(self.offsets)
+        for entry in range(len(self)):
+            for column, field in enumerate(self.fields):
+                start, end = offsets[entry, column]
+                if start >= 0:
+                    yield field, self.tokens[start:end]
+
+    def decode(self, token_ids) -> List[str]:
+        return [self.vocabulary[token_id] for token_id in token_ids]
+
+
+def _source_signature(json_file_path: str) -> Dict[str, int]:
+    stat = os.stat(json_file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def build_corpus_store(json_file_path: str, directory: str, tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> CorpusStore:
+    """
+    流式读取标注文件，对 description 及五种画面属性各分词一次，写出整数化语料存储
+
+    参数:
+        json_file_path (str): JSON/JSONL 标注文件路径
+        directory (str): 存储目录
+        tokenizer (Tokenizer): 分词器，其规则记录在存储的元数据中
+
+    返回:
+        CorpusStore: 以内存映射方式打开的存储
+    """
+    os.makedirs(directory, exist_ok=True)
+    vocabulary: Dict[str, int] = {}
+    pending = array('I')
+    offsets = array('q')
+    request_ids = []
+    position = 0
+
+    with open(os.path.join(directory, TOKENS_FILE), 'wb') as token_file:
+        def add_text(text):
+            nonlocal pending, position
+            words = tokenizer.tokenize(text)
+            start = position
+            for word in words:
+                token_id = vocabulary.get(word)
+                if token_id is None:
+                    token_id = vocabulary[word] = len(vocabulary)
+                pending.append(token_id)
+            position += len(words)
+            if len(pending) >= _FLUSH_TOKENS:
+                pending.tofile(token_file)
+                pending = array('I')
+            return start, position
+
+        for entry in iter_json_entries(json_file_path):
+            row = [-1] * (2 * len(FIELDS))
+            try:
+                row[0:2] = add_text(entry['description']['first_section']['description'])
+                visual_attrs = entry['description']['second_section']['visual_attributes']
+                for column, attr in enumerate(ATTRIBUTE_FIELDS, 1):
+                    row[2 * column:2 * column + 2] = add_text(visual_attrs.get(attr, ''))
+            except KeyError as e:
+                print(f"警告: 条目缺少字段 {e}，跳过该条目")
+            offsets.extend(row)
+            request_ids.append(entry.get('request_id', '') if isinstance(entry, dict) else '')
+
+        pending.tofile(token_file)
+
+    offsets_array = np.frombuffer(offsets, dtype=np.int64).reshape(-1, len(FIELDS), 2)
+    np.save(os.path.join(directory, OFFSETS_FILE), offsets_array)
+
+    words = [None] * len(vocabulary)
+    for word, token_id in vocabulary.items():
+        words[token_id] = word
+    with open(os.path.join(directory, VOCAB_FILE), 'w', encoding='utf-8') as f:
+        json.dump(words, f, ensure_ascii=False)
+
+    meta = {
+        'source': os.path.abspath(json_file_path),
+        'signature': _source_signature(json_file_path),
+        'fields': FIELDS,
+        'tokenizer': tokenizer.config,
+        'request_ids': request_ids,
+        'token_count': position,
+    }
+    with open(os.path.join(directory, META_FILE), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+
+    return CorpusStore(directory)
+
+
+def load_or_build_corpus_store(json_file_path: str, directory: str,
+                               tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> CorpusStore:
+    """存储存在、与源文件大小和修改时间一致且分词规则相同时直接打开，否则重新构建"""
+    try:
+        store = CorpusStore(directory)
+        if (store.meta.get('signature') == _source_signature(json_file_path)
+                and store.meta.get('tokenizer') == tokenizer.config):
+            return store
+    except (FileNotFoundError, json.JSONDecodeError, KeyError, ValueError):
+        pass
+    return build_corpus_store(json_file_path, directory, tokenizer)
+
+
+def gather_field(store: CorpusStore, field: str) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    取出某字段所有存在的文本
+
+    返回:
+        (条目下标, 每个文本的词数, 依次拼接的词ID)
+    """
+    column = store.fields.index(field)
+    spans = np.asarray(store.offsets[:, column, :])
+    entries = np.flatnonzero(spans[:, 0] >= 0)
+    starts = spans[entries, 0]
+    lengths = spans[entries, 1] - starts
+    # 每个词在 tokens 中的位置：所在区间起点 + 区间内序号
+    within = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    token_ids = np.asarray(store.tokens[np.repeat(starts, lengths) + within], dtype=np.int64)
+    return entries, lengths, token_ids
+
+
+def process_store_metrics(store: CorpusStore, threshold: float = 0.72) -> dict:
+    """
+    直接在整数词ID上计算每个字段的平均 TTR、Shannon 熵和 MTLD，结果与 process_json_metrics 一致
+    MTLD 按字段整批向量化计算；TTR 与熵在每个文本的词ID上计数
+
+    返回:
+        dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}
+    """
+    stats = new_field_stats()
+    for field in store.fields:
+        _, lengths, token_ids = gather_field(store, field)
+        mtld = mtld_batch_from_ids(token_ids, lengths, threshold)
+        field_stats = stats[field]
+        for name, column in (('mtld_forward', 0), ('mtld_reverse', 1), ('mtld_avg', 2)):
+            field_stats[name].update(mtld[:, column].tolist())
+
+        ids = token_ids.tolist()
+        start = 0
+        for length in lengths.tolist():
+            metrics = compute_token_metrics(ids[start:start + length], threshold, with_mtld=False)
+            field_stats['ttr'].add(metrics['ttr'])
+            field_stats['entropy'].add(metrics['entropy'])
+            start += length
+    return summarize_field_stats(stats)
+
+
+if __name__ == "__main__":
+    json_file_path = r'E:\Annotation\Abstract Art.json'  # Update to your actual JSON file path
+    store = load_or_build_corpus_store(json_file_path, json_file_path + '.store')
+    print(f"{len(store)} 条目, {store.meta['token_count']} 词, 词表大小 {len(store.vocabulary)}")
+    for field, metrics in process_store_metrics(store).items():
+        print(f"{field}: TTR {metrics['ttr']:.4f}, 熵 {metrics['entropy']:.4f} bits, MTLD {metrics['mtld']['avg']:.2f}")
@@ -0,0 +1,202 @@
+import hashlib
+import json
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from annotation_stream import iter_json_entries
+from lexical_metrics import FIELDS, METRICS, iter_field_metrics, new_field_stats, summarize_field_stats
+from metric_stats import RunningStats
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+# 存储格式版本，计算规则变化时递增以强制全部重算
+_SCHEMA_VERSION = 1
+
+
+def entry_hash(entry: dict) -> str:
+    """条目中参与指标计算部分（description）的内容哈希"""
+    description = entry.get('description') if isinstance(entry, dict) else entry
+    payload = json.dumps(description, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def entry_metrics(entry: dict, threshold: float, tokenizer: Tokenizer) -> List[Tuple[str, List[float]]]:
+    """单个条目产生的 (字段名, [各项指标]) 列表，缺字段时与 iter_field_metrics 一样只保留已处理的部分"""
+    return [(field, [metrics[metric] for metric in METRICS])
+            for field, metrics in iter_field_metrics([entry], threshold, tokenizer)]
+
+
+class IncrementalMetricsStore:
+    """
+    按条目持久化词汇多样性指标，标注文件修改后只重算新增或内容变化的条目
+
+    每个条目以 request_id（重复时追加序号，缺失时使用条目位置）为键，保存 description 的内容哈希
+    与各字段的指标；各字段各指标的流式统计量（精确和、数量）一同保存，增删条目时精确地加上或减去
+    对应的值，因此更新后的平均值与对整个文件重新计算的结果完全一致。
+    阈值或分词规则改变时清空并重算
+
+    参数:
+        db_path (str): SQLite 文件路径
+        threshold (float): MTLD 的 TTR 阈值（默认 0.72）
+        tokenizer (Tokenizer): 分词器
+    """
+
+    def __init__(self, db_path: str, threshold: float = 0.72, tokenizer: Tokenizer = DEFAULT_TOKENIZER):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.tokenizer = tokenizer
+        self._db = sqlite3.connect(db_path)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS entries (key TEXT PRIMARY KEY, hash TEXT, metrics TEXT);
+            CREATE TABLE IF NOT EXISTS aggregates (field TEXT, metric TEXT, state TEXT,
+                                                   PRIMARY KEY (field, metric));
+        """)
+        config = json.dumps({'version': _SCHEMA_VERSION, 'threshold': threshold, 'tokenizer': tokenizer.config},
+                            sort_keys=True)
+        if self._get_meta('config') != config:
+            self._db.executescript("DELETE FROM meta; DELETE FROM entries; DELETE FROM aggregates;")
+            self._set_meta('config', config)
+            self._db.commit()
+        self.stats = self._load_stats()
+
+    def close(self):
+        self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _load_stats(self) -> Dict[str, Dict[str, RunningStats]]:
+        stats = new_field_stats()
+        for field, metric, state in self._db.execute("SELECT field, metric, state FROM aggregates"):
+            if field in stats and metric in stats[field]:
+                stats[field][metric] = RunningStats.from_state(json.loads(state))
+        return stats
+
+    def _apply(self, field_metrics: List[Tuple[str, List[float]]], remove: bool = False) -> None:
+        for field, values in field_metrics:
+            for metric, value in zip(METRICS, values):
+                if remove:
+                    self.stats[field][metric].remove(value)
+                else:
+                    self.stats[field][metric].add(value)
+
+    def update(self, json_file_path: str, force: bool = False) -> Dict[str, int]:
+        """
+        与标注文件同步：文件大小和修改时间未变时直接跳过，否则流式读取并比对每个条目的内容哈希
+
+        中途出错时数据库与内存中的统计量都保持上次成功同步后的状态，异常原样抛出
+
+        返回:
+            dict: added, changed, removed, unchanged 各自的条目数（跳过时全为 0）
+        """
+        stat = os.stat(json_file_path)
+        signature = json.dumps({'source': os.path.abspath(json_file_path), 'size': stat.st_size,
+                                'mtime_ns': stat.st_mtime_ns})
+        counts = {'added': 0, 'changed': 0, 'removed': 0, 'unchanged': 0}
+        if not force and self._get_meta('signature') == signature:
+            return counts
+
+        try:
+            stored = dict(self._db.execute("SELECT key, hash FROM entries"))
+            seen = set()
+            occurrences = {}
+            for position, entry in enumerate(iter_json_entries(json_file_path)):
+                request_id = entry.get('request_id') if isinstance(entry, dict) else None
+                if request_id:
+                    occurrence = occurrences.get(request_id, 0)
+                    occurrences[request_id] = occurrence + 1
+                    key = request_id if not occurrence else f'{request_id}#{occurrence}'
+                else:
+                    key = f'#{position}'
+                seen.add(key)
+
+                digest = entry_hash(entry)
+                previous = stored.get(key)
+                if previous == digest:
+                    counts['unchanged'] += 1
+                    continue
+                if previous is None:
+                    counts['added'] += 1
+                else:
+                    counts['changed'] += 1
+                    self._apply(self._stored_metrics(key), remove=True)
+                field_metrics = entry_metrics(entry, self.threshold, self.tokenizer)
+                self._apply(field_metrics)
+                self._db.execute("INSERT OR REPLACE INTO entries (key, hash, metrics) VALUES (?, ?, ?)",
+                                 (key, digest, json.dumps(field_metrics)))
+
+            for key in stored.keys() - seen:
+                counts['removed'] += 1
+                self._apply(self._stored_metrics(key), remove=True)
+                self._db.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+            self._db.executemany("INSERT OR REPLACE INTO aggregates (field, metric, state) VALUES (?, ?, ?)",
+                                 [(field, metric, json.dumps(self.stats[field][metric].state()))
+                                  for field in FIELDS for metric in METRICS])
+            self._set_meta('signature', signature)
+            self._db.commit()
+        except BaseException:
+            # 读到一半失败（如JSON格式错误）时数据库事务回滚，内存中的统计量也恢复到上次提交的状态
+            self._db.rollback()
+            self.stats = self._load_stats()
+            raise
+        return counts
+
+    def _stored_metrics(self, key: str) -> List[Tuple[str, List[float]]]:
+        row = self._db.execute("SELECT metrics FROM entries WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def summary(self) -> dict:
+        """
+        返回:
+            dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}，格式同 process_json_metrics
+        """
+        return summarize_field_stats(self.stats)
+
+
+def process_json_metrics_incremental(json_file_path: str, db_path: Optional[str] = None, threshold: float = 0.72,
+                                     tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> dict:
+    """
+    增量版的 process_json_metrics：只重算上次运行后新增或修改的条目，结果与全量计算完全一致
+
+    参数:
+        json_file_path (str): JSON/JSONL 标注文件路径
+        db_path (str): 指标存储路径，默认为标注文件旁的 .metrics.sqlite
+        threshold (float): MTLD 的 TTR 阈值（默认 0.72）
+        tokenizer (Tokenizer): 分词器
+
+    返回:
+        dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}
+    """
+    try:
+        with IncrementalMetricsStore(db_path or json_file_path + '.metrics.sqlite', threshold, tokenizer) as store:
+            counts = store.update(json_file_path)
+            if any(counts.values()):
+                print(f"新增 {counts['added']} 条, 修改 {counts['changed']} 条, 删除 {counts['removed']} 条, "
+                      f"未变 {counts['unchanged']} 条")
+            return store.summary()
+
+    except FileNotFoundError:
+        print(f"错误: 文件 {json_file_path} 未找到")
+        return {}
+    except json.JSONDecodeError:
+        print(f"错误: 文件 {json_file_path} 不是有效的JSON格式")
+        return {}
+
+
+if __name__ == "__main__":
+    json_file_path = r'E:\Annotation\Abstract Art.json'  # Update to your actual JSON file path
+    results = process_json_metrics_incremental(json_file_path)
+    for field, metrics in results.items():
+        print(f"{field}: TTR {metrics['ttr']:.4f}, 熵 {metrics['entropy']:.4f} bits, MTLD {metrics['mtld']['avg']:.2f}")
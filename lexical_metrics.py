@@ -0,0 +1,336 @@
+import json
+import math
+import os
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from annotation_stream import iter_json_entries
+from metric_stats import PERCENTILES, MetricSample, RunningStats
+from MTLD import mtld_from_words
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+# description 及五种画面属性
+ATTRIBUTE_FIELDS = ['brushstroke', 'color', 'composition', 'light_and_shadow', 'line_quality']
+FIELDS = ['description'] + ATTRIBUTE_FIELDS
+
+# 每个字段输出的指标
+METRICS = ['ttr', 'entropy', 'mtld_forward', 'mtld_reverse', 'mtld_avg']
+
+
+def compute_text_metrics(text: str, threshold: float = 0.72,
+                         tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> Dict[str, float]:
+    """
+    对一段英文文本只分词一次，同时计算 TTR、Shannon 熵和 MTLD
+
+    参数:
+        text (str): 输入的英文文本
+        threshold (float): MTLD 的 TTR 阈值（默认 0.72）
+        tokenizer (Tokenizer): 分词器，默认规则与各单项脚本相同
+
+    返回:
+        dict: ttr, types, tokens, entropy, mtld_forward, mtld_reverse, mtld_avg
+        结果与 TTR.py、Shannon entropy.py、MTLD.py 中对应函数完全一致
+    """
+    words = tokenizer.tokenize(text)
+    return compute_token_metrics(words, threshold)
+
+
+def compute_token_metrics(words: Sequence[Hashable], threshold: float = 0.72,
+                          with_mtld: bool = True) -> Dict[str, float]:
+    """
+    对已分词的单词列表或整数词ID序列计算 TTR、Shannon 熵和 MTLD，返回格式同 compute_text_metrics
+    with_mtld=False 时跳过 MTLD（由调用方批量计算），对应的值为 0.0
+    """
+    if not words:
+        return {'ttr': 0.0, 'types': 0, 'tokens': 0, 'entropy': 0.0,
+                'mtld_forward': 0.0, 'mtld_reverse': 0.0, 'mtld_avg': 0.0}
+
+    token_count = len(words)
+    word_counts = Counter(words)
+
+    entropy = 0.0
+    for count in word_counts.values():
+        probability = count / token_count
+        entropy -= probability * math.log2(probability)
+
+    if with_mtld:
+        mtld_forward, mtld_reverse, mtld_avg = mtld_from_words(words, threshold)
+    else:
+        mtld_forward = mtld_reverse = mtld_avg = 0.0
+
+    return {
+        'ttr': len(word_counts) / token_count,
+        'types': len(word_counts),
+        'tokens': token_count,
+        'entropy': entropy,
+        'mtld_forward': mtld_forward,
+        'mtld_reverse': mtld_reverse,
+        'mtld_avg': mtld_avg,
+    }
+
+
+def iter_field_metrics(entries: Iterable[dict], threshold: float = 0.72,
+                       tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> Iterator[Tuple[str, Dict[str, float]]]:
+    """
+    逐条目产出 (字段名, 指标字典)
+
+    与各单项脚本的行为保持一致：先处理 description，再处理五种画面属性；
+    条目缺少字段时打印警告并跳过该条目剩余部分
+    """
+    for entry in entries:
+        try:
+            desc_text = entry['description']['first_section']['description']
+            yield 'description', compute_text_metrics(desc_text, threshold, tokenizer)
+
+            visual_attrs = entry['description']['second_section']['visual_attributes']
+            for attr in ATTRIBUTE_FIELDS:
+                yield attr, compute_text_metrics(visual_attrs.get(attr, ''), threshold, tokenizer)
+
+        except KeyError as e:
+            print(f"警告: 条目缺少字段 {e}，跳过该条目")
+            continue
+
+
+def summarize_field_metrics(field_metrics: Iterable[Tuple[str, Dict[str, float]]]) -> dict:
+    """
+    把 (字段名, 指标字典) 流汇总为每个字段每项指标的平均值
+
+    返回:
+        dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}
+    """
+    stats = new_field_stats()
+    for field, metrics in field_metrics:
+        for metric in METRICS:
+            stats[field][metric].add(metrics[metric])
+    return summarize_field_stats(stats)
+
+
+def new_field_stats() -> Dict[str, Dict[str, RunningStats]]:
+    """每个字段每项指标一个空的流式统计量"""
+    return {field: {metric: RunningStats() for metric in METRICS} for field in FIELDS}
+
+
+def new_field_samples() -> Dict[str, Dict[str, MetricSample]]:
+    """每个字段每项指标一个保存全部取值的样本，用于分布统计"""
+    return {field: {metric: MetricSample() for metric in METRICS} for field in FIELDS}
+
+
+def describe_field_samples(samples: Dict[str, Dict[str, MetricSample]], percentiles: Sequence[float] = PERCENTILES,
+                           n_boot: int = 1000, confidence: float = 0.95, seed: Optional[int] = 0) -> dict:
+    """
+    每个字段每项指标的分布统计
+
+    返回:
+        dict: {字段: {指标: {count, mean, stdev, min, max, percentiles, ci}}}
+    """
+    return {field: {metric: samples[field][metric].describe(percentiles, n_boot, confidence, seed)
+                    for metric in METRICS}
+            for field in FIELDS}
+
+
+def summarize_field_stats(stats: Dict[str, Dict[str, RunningStats]]) -> dict:
+    """
+    把每个字段每项指标的流式统计量整理为平均值
+
+    返回:
+        dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}
+    """
+    summary = {}
+    for field in FIELDS:
+        averages = {metric: stats[field][metric].mean for metric in METRICS}
+        if not stats[field]['ttr'].count:
+            print(f"警告: 字段 {field} 没有有效数据，平均值设为0.0")
+        summary[field] = {
+            'ttr': averages['ttr'],
+            'entropy': averages['entropy'],
+            'mtld': {
+                'forward': averages['mtld_forward'],
+                'reverse': averages['mtld_reverse'],
+                'avg': averages['mtld_avg'],
+            },
+        }
+    return summary
+
+
+def process_json_metrics(json_file_path: str, threshold: float = 0.72,
+                         tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> dict:
+    """
+    读取JSON文件一次，对每个条目中description及五种画面属性只分词一次，
+    同时返回平均 TTR、Shannon 熵和 MTLD（正向、反向、平均）
+
+    参数:
+        json_file_path (str): JSON文件路径
+        threshold (float): MTLD 的 TTR 阈值（默认 0.72）
+        tokenizer (Tokenizer): 分词器
+
+    返回:
+        dict: {字段: {ttr, entropy, mtld: {forward, reverse, avg}}}
+    """
+    try:
+        # 流式逐条读取，均值使用常量内存的流式统计量
+        return summarize_field_metrics(iter_field_metrics(iter_json_entries(json_file_path), threshold, tokenizer))
+
+    except FileNotFoundError:
+        print(f"错误: 文件 {json_file_path} 未找到")
+        return {}
+    except json.JSONDecodeError:
+        print(f"错误: 文件 {json_file_path} 不是有效的JSON格式")
+        return {}
+
+
+def process_json_distributions(json_file_path: str, threshold: float = 0.72,
+                               tokenizer: Tokenizer = DEFAULT_TOKENIZER, n_boot: int = 1000,
+                               confidence: float = 0.95) -> dict:
+    """
+    读取JSON文件一次，返回每个字段每项指标的分布统计：
+    数量、均值、标准差、最小/最大值、精确百分位数，以及均值的 bootstrap 置信区间
+
+    返回:
+        dict: {字段: {指标: {count, mean, stdev, min, max, percentiles, ci}}}
+    """
+    try:
+        samples = collect_field_stats(iter_json_entries(json_file_path), threshold, tokenizer, keep_values=True)
+        return describe_field_samples(samples, n_boot=n_boot, confidence=confidence)
+
+    except FileNotFoundError:
+        print(f"错误: 文件 {json_file_path} 未找到")
+        return {}
+    except json.JSONDecodeError:
+        print(f"错误: 文件 {json_file_path} 不是有效的JSON格式")
+        return {}
+
+
+def collect_field_stats(entries: Iterable[dict], threshold: float = 0.72, tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+                        keep_values: bool = False) -> Dict[str, Dict[str, RunningStats]]:
+    """
+    计算一组条目的部分统计量（也是单文件模式下进程池的任务函数）
+    keep_values=True 时返回保存全部取值的 MetricSample，可用于百分位数和 bootstrap
+    """
+    stats = new_field_samples() if keep_values else new_field_stats()
+    for field, metrics in iter_field_metrics(entries, threshold, tokenizer):
+        for metric in METRICS:
+            stats[field][metric].add(metrics[metric])
+    return stats
+
+
+def _file_field_stats(json_file_path: str, threshold: float, tokenizer: Tokenizer,
+                      keep_values: bool) -> Dict[str, Dict[str, RunningStats]]:
+    """进程池任务：流式计算一个文件的部分统计量"""
+    return collect_field_stats(iter_json_entries(json_file_path), threshold, tokenizer, keep_values)
+
+
+def merge_field_stats(target: Dict[str, Dict[str, RunningStats]],
+                      other: Dict[str, Dict[str, RunningStats]]) -> Dict[str, Dict[str, RunningStats]]:
+    """把另一份部分统计量精确并入 target（数量与和精确合并，均值与串行结果一致）"""
+    for field in FIELDS:
+        for metric in METRICS:
+            target[field][metric].merge(other[field][metric])
+    return target
+
+
+def _iter_chunks(entries: Iterable[dict], chunk_size: int) -> Iterator[List[dict]]:
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def process_corpus_metrics(path: str, num_workers: Optional[int] = None, threshold: float = 0.72,
+                           chunk_size: int = 2000, tokenizer: Tokenizer = DEFAULT_TOKENIZER,
+                           distributions: bool = False, n_boot: int = 1000, confidence: float = 0.95) -> dict:
+    """
+    在进程池中计算整个语料的词汇多样性指标
+
+    path 为目录时，目录下每个 .json/.jsonl 文件视为一种画风，每个文件一个任务；
+    path 为单个文件时，主进程流式读取条目并按 chunk_size 切块分发，最多同时提交 2×num_workers 块。
+    各进程返回部分统计量后精确合并，结果与串行的 process_json_metrics 完全一致
+
+    参数:
+        path (str): 标注文件目录或单个标注文件
+        num_workers (int): 进程数，默认等于CPU核数
+        threshold (float): MTLD 的 TTR 阈值（默认 0.72）
+        chunk_size (int): 单文件模式下每个任务的条目数
+        tokenizer (Tokenizer): 分词器
+        distributions (bool): 为 True 时每项指标改为输出 describe_field_samples 的分布统计
+                              （标准差、百分位数、均值的 bootstrap 置信区间）
+        n_boot (int): bootstrap 重抽样次数
+        confidence (float): 置信水平
+
+    返回:
+        dict: {'styles': {画风: 指标}, 'global': 指标}；单文件模式下 styles 为空，
+              文件不存在或不是有效的JSON时打印错误并返回空字典
+    """
+    num_workers = num_workers or os.cpu_count() or 1
+    global_stats = new_field_samples() if distributions else new_field_stats()
+
+    def summarize(stats):
+        if distributions:
+            return describe_field_samples(stats, n_boot=n_boot, confidence=confidence)
+        return summarize_field_stats(stats)
+
+    results = {'styles': {}, 'global': {}}
+
+    with ProcessPoolExecutor(max_workers=num_workers) as pool:
+        if os.path.isdir(path):
+            files = sorted(name for name in os.listdir(path) if name.lower().endswith(('.json', '.jsonl')))
+            # 画风名取文件名去掉扩展名；同名的 .json / .jsonl 并存时改用完整文件名，避免互相覆盖
+            stems = Counter(os.path.splitext(name)[0] for name in files)
+            styles = {}
+            for name in files:
+                style = os.path.splitext(name)[0]
+                if stems[style] > 1:
+                    print(f"警告: 画风 {style} 对应多个文件，改用文件名 {name} 作为结果的键")
+                    style = name
+                styles[name] = style
+            futures = {name: pool.submit(_file_field_stats, os.path.join(path, name),
+                                         threshold, tokenizer, distributions)
+                       for name in files}
+            for name, future in futures.items():
+                try:
+                    stats = future.result()
+                except json.JSONDecodeError:
+                    print(f"错误: 文件 {name} 不是有效的JSON格式，跳过")
+                    continue
+                style = styles[name]
+                results['styles'][style] = summarize(stats)
+                merge_field_stats(global_stats, stats)
+        else:
+            pending = deque()
+            try:
+                for chunk in _iter_chunks(iter_json_entries(path), chunk_size):
+                    pending.append(pool.submit(collect_field_stats, chunk, threshold, tokenizer, distributions))
+                    if len(pending) >= 2 * num_workers:
+                        merge_field_stats(global_stats, pending.popleft().result())
+            except FileNotFoundError:
+                print(f"错误: 文件 {path} 未找到")
+                pool.shutdown(cancel_futures=True)
+                return {}
+            except json.JSONDecodeError:
+                print(f"错误: 文件 {path} 不是有效的JSON格式")
+                pool.shutdown(cancel_futures=True)
+                return {}
+            while pending:
+                merge_field_stats(global_stats, pending.popleft().result())
+
+    results['global'] = summarize(global_stats)
+    return results
+
+
+if __name__ == "__main__":
+    json_file_path = r'D:\Openai_api\data.json'  # Update to your actual JSON file path
+    results = process_json_metrics(json_file_path)
+    if results:
+        print("各字段的词汇多样性指标:")
+        for field, metrics in results.items():
+            print(f"{field}:")
+            print(f"  平均TTR: {metrics['ttr']:.4f}")
+            print(f"  平均Shannon熵: {metrics['entropy']:.4f} bits")
+            print(f"  平均MTLD: 正向 {metrics['mtld']['forward']:.2f} / 反向 {metrics['mtld']['reverse']:.2f}"
+                  f" / 平均 {metrics['mtld']['avg']:.2f}")
+    else:
+        print("错误: 无法计算指标，检查JSON文件或路径")
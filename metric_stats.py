@@ -0,0 +1,250 @@
+import math
+from array import array
+from fractions import Fraction
+from typing import Dict, Iterable, Optional, Sequence
+
+import numpy as np
+
+# 默认报告的百分位数
+PERCENTILES = (5, 25, 50, 75, 95)
+
+
+class RunningStats:
+    """
+    常量内存的流式统计量：数量、精确和、均值、方差、最小值、最大值
+
+    和以 Shewchuk 无误差分量（同 math.fsum 的算法）保存，因此均值与 statistics.mean 的结果完全一致，
+    且多个部分结果可以精确合并；方差使用 Welford 算法，合并时使用 Chan 等人的并行公式
+    """
+
+    __slots__ = ('count', 'partials', '_mean', '_m2', 'min', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.partials = []
+        self._mean = 0.0
+        self._m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float) -> None:
+        self.count += 1
+        self._add_partial(value)
+        delta = value - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (value - self._mean)
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    def remove(self, value: float) -> None:
+        """
+        撤销一次先前的 add(value)：数量与精确和精确回退，方差按 Welford 公式反向更新；
+        最小值/最大值无法回退，仍为曾经加入过的所有值的范围
+        """
+        if self.count <= 1:
+            self.__init__()
+            return
+        self.count -= 1
+        self._add_partial(-value)
+        mean = self._mean - (value - self._mean) / self.count
+        self._m2 = max(self._m2 - (value - self._mean) * (value - mean), 0.0)
+        self._mean = mean
+
+    def update(self, values: Iterable[float]) -> 'RunningStats':
+        for value in values:
+            self.add(value)
+        return self
+
+    def _add_partial(self, x: float) -> None:
+        # Shewchuk 算法：partials 是互不重叠、按绝对值递增的浮点分量，其精确和即所有输入之和
+        partials = self.partials
+        i = 0
+        for y in partials:
+            if abs(x) < abs(y):
+                x, y = y, x
+            hi = x + y
+            lo = y - (hi - x)
+            if lo:
+                partials[i] = lo
+                i += 1
+            x = hi
+        partials[i:] = [x]
+
+    def merge(self, other: 'RunningStats') -> 'RunningStats':
+        """把另一个部分结果并入当前统计量（就地修改并返回自身）"""
+        if not other.count:
+            return self
+        if not self.count:
+            self.count = other.count
+            self.partials = list(other.partials)
+            self._mean, self._m2 = other._mean, other._m2
+            self.min, self.max = other.min, other.max
+            return self
+
+        for partial in other.partials:
+            self._add_partial(partial)
+        count = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / count
+        self._mean += delta * other.count / count
+        self.count = count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def sum(self) -> float:
+        return math.fsum(self.partials)
+
+    @property
+    def mean(self) -> float:
+        """与 statistics.mean 相同：精确和除以数量后只舍入一次"""
+        if not self.count:
+            return 0.0
+        return float(sum(map(Fraction, self.partials), Fraction(0)) / self.count)
+
+    @property
+    def variance(self) -> float:
+        """样本方差（n-1）"""
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def stdev(self) -> float:
+        return math.sqrt(self.variance)
+
+    def state(self) -> dict:
+        """可JSON序列化的完整状态，用于持久化后继续累加"""
+        return {'count': self.count, 'partials': list(self.partials), 'mean': self._mean, 'm2': self._m2,
+                'min': self.min, 'max': self.max}
+
+    @classmethod
+    def from_state(cls, state: dict) -> 'RunningStats':
+        stats = cls()
+        stats.count = state['count']
+        stats.partials = list(state['partials'])
+        stats._mean, stats._m2 = state['mean'], state['m2']
+        stats.min, stats.max = state['min'], state['max']
+        return stats
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'mean': self.mean,
+            'stdev': self.stdev,
+            'min': self.min if self.count else 0.0,
+            'max': self.max if self.count else 0.0,
+        }
+
+
+class MetricSample:
+    """
+    取值样本：一个 RunningStats 加上全部取值（紧凑的 float64 数组，每个值 8 字节），用于精确百分位数和 bootstrap
+
+    13 万条目 × 6 字段 × 5 项指标约 31MB，因此直接保存原值计算精确分位数，不使用 t-digest 等近似草图；
+    均值仍来自精确和，与 process_json_metrics 的结果一致。只支持追加和合并，不支持撤销取值
+    """
+
+    __slots__ = ('stats', 'values')
+
+    def __init__(self):
+        self.stats = RunningStats()
+        self.values = array('d')
+
+    def add(self, value: float) -> None:
+        self.stats.add(value)
+        self.values.append(value)
+
+    def update(self, values: Iterable[float]) -> 'MetricSample':
+        for value in values:
+            self.add(value)
+        return self
+
+    def merge(self, other: 'MetricSample') -> 'MetricSample':
+        self.stats.merge(other.stats)
+        self.values.extend(other.values)
+        return self
+
+    @property
+    def count(self) -> int:
+        return self.stats.count
+
+    @property
+    def mean(self) -> float:
+        return self.stats.mean
+
+    @property
+    def stdev(self) -> float:
+        return self.stats.stdev
+
+    def summary(self) -> dict:
+        return self.stats.summary()
+
+    def to_numpy(self) -> np.ndarray:
+        return np.frombuffer(self.values, dtype=np.float64) if self.values else np.zeros(0)
+
+    def describe(self, percentiles: Sequence[float] = PERCENTILES, n_boot: int = 1000, confidence: float = 0.95,
+                 seed: Optional[int] = 0) -> dict:
+        """
+        返回:
+            dict: count, mean, stdev, min, max, percentiles {p: 值}, ci [下限, 上限]（均值的 bootstrap 置信区间）
+        """
+        # 排序后再计算，使结果与取值的加入顺序（文件划分、进程合并顺序）无关
+        values = np.sort(self.to_numpy())
+        summary = self.summary()
+        if values.size > 1:
+            summary['stdev'] = float(values.std(ddof=1))
+        if values.size:
+            summary['percentiles'] = dict(zip(percentiles, np.percentile(values, percentiles).tolist()))
+        else:
+            summary['percentiles'] = {p: 0.0 for p in percentiles}
+        summary['ci'] = list(bootstrap_mean_ci(values, n_boot, confidence, seed))
+        return summary
+
+
+def bootstrap_means(values: np.ndarray, n_boot: int = 1000, seed: Optional[int] = 0,
+                    max_elements: int = 1 << 22) -> np.ndarray:
+    """
+    有放回重抽样 n_boot 次，返回每次重抽样的均值
+
+    每次生成若干行重抽样下标 [行数, n] 并整块求均值，单块不超过 max_elements 个元素，
+    内存占用与 n_boot 无关
+
+    参数:
+        values (np.ndarray): 原始样本
+        n_boot (int): 重抽样次数
+        seed (int): 随机种子，None 表示不固定
+        max_elements (int): 每块下标矩阵的元素数上限
+
+    返回:
+        np.ndarray: 形状 [n_boot] 的均值
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = values.size
+    means = np.zeros(n_boot, dtype=np.float64)
+    if not n or not n_boot:
+        return means
+    rng = np.random.default_rng(seed)
+    rows = max(1, max_elements // n)
+    for start in range(0, n_boot, rows):
+        stop = min(start + rows, n_boot)
+        indices = rng.integers(0, n, size=(stop - start, n))
+        means[start:stop] = values[indices].mean(axis=1)
+    return means
+
+
+def bootstrap_mean_ci(values: np.ndarray, n_boot: int = 1000, confidence: float = 0.95,
+                      seed: Optional[int] = 0) -> tuple:
+    """均值的 bootstrap 百分位置信区间 (下限, 上限)；样本为空时为 (0.0, 0.0)"""
+    means = bootstrap_means(values, n_boot, seed)
+    if not np.size(values) or not n_boot:
+        return 0.0, 0.0
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(means, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+
+def describe_samples(samples: Dict[str, MetricSample], **kwargs) -> Dict[str, dict]:
+    """对一组命名样本分别调用 describe，关键字参数原样传入"""
+    return {name: sample.describe(**kwargs) for name, sample in samples.items()}
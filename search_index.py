@@ -0,0 +1,151 @@
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+# 可筛选的类别字段（third_section 中）：查询中的名称 → 标注中的键
+CATEGORY_FIELDS = {
+    'emotion': 'dominant_emotion',
+    'valence': 'emotional_valence',
+    'arousal': 'emotional_arousal_level',
+}
+
+
+class SearchIndex:
+    """
+    标注条目的内存倒排索引：三种情感类别字段，以及 description 和五种画面属性中的单词；
+    同时记录每个条目的 request_id 和 request_id → 下标的哈希索引，用于跳转
+
+    每个键对应按条目下标递增的 uint32 倒排表；查询时从最短的倒排表开始，
+    用二分查找依次求交集，13 万条目规模下为毫秒级
+    单词按词汇多样性指标相同的分词规则切分（小写英文单词）
+
+    参数:
+        tokenizer (Tokenizer): 分词器；建立索引时总是按相同规则不缓存地分词，
+            每个条目的文本各不相同，缓存只会让内存随条目数增长
+    """
+
+    def __init__(self, tokenizer: Tokenizer = DEFAULT_TOKENIZER):
+        self.tokenizer = tokenizer
+        self._index_tokenizer = tokenizer if not tokenizer.cache_size else Tokenizer(**tokenizer.config)
+        self.count = 0
+        self.complete = False
+        self.words: Dict[str, array] = {}
+        self.categories: Dict[str, Dict[str, array]] = {name: {} for name in CATEGORY_FIELDS}
+        self.labels: Dict[str, Dict[str, str]] = {name: {} for name in CATEGORY_FIELDS}  # 小写值 → 首次出现的写法
+        self.request_ids: List[Optional[str]] = []   # 下标 → request_id（缺失或无法解析时为 None）
+        self.positions: Dict[str, int] = {}          # request_id → 首次出现的下标
+        self._cancelled = threading.Event()
+
+    def add(self, position: int, entry) -> None:
+        """加入一个条目；position 必须递增"""
+        self.count = max(self.count, position + 1)
+        request_ids = self.request_ids
+        if len(request_ids) < position:
+            request_ids.extend([None] * (position - len(request_ids)))
+        request_id = entry.get('request_id') if isinstance(entry, dict) else None
+        if request_id is not None:
+            request_id = str(request_id)
+            self.positions.setdefault(request_id, position)
+        request_ids.append(request_id)
+
+        description = entry.get('description') if isinstance(entry, dict) else None
+        if not isinstance(description, dict):
+            return
+
+        third_section = description.get('third_section')
+        if isinstance(third_section, dict):
+            for name, key in CATEGORY_FIELDS.items():
+                value = third_section.get(key)
+                if isinstance(value, str) and value.strip():
+                    label = value.strip()
+                    normalized = label.lower()
+                    self.categories[name].setdefault(normalized, array('I')).append(position)
+                    self.labels[name].setdefault(normalized, label)
+
+        texts = []
+        first_section = description.get('first_section')
+        if isinstance(first_section, dict) and isinstance(first_section.get('description'), str):
+            texts.append(first_section['description'])
+        second_section = description.get('second_section')
+        if isinstance(second_section, dict) and isinstance(second_section.get('visual_attributes'), dict):
+            texts.extend(value for value in second_section['visual_attributes'].values() if isinstance(value, str))
+
+        postings = self.words
+        for word in set(self._index_tokenizer.tokenize('\n'.join(texts))):
+            posting = postings.get(word)
+            if posting is None:
+                posting = postings[word] = array('I')
+            posting.append(position)
+
+    def build(self, entries: Iterable[Tuple[int, dict]]) -> 'SearchIndex':
+        """从 (下标, 条目) 流建立索引，例如 AnnotationIndex.iter_entries()，可在后台线程中运行"""
+        for position, entry in entries:
+            if self._cancelled.is_set():
+                return self
+            self.add(position, entry)
+        self.complete = True
+        return self
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def request_id(self, position: int) -> Optional[str]:
+        """第 position 个条目的 request_id"""
+        return self.request_ids[position] if position < len(self.request_ids) else None
+
+    def lookup(self, request_id: str) -> Optional[int]:
+        """request_id 对应的条目下标（重复时取第一个），不存在时返回 None"""
+        return self.positions.get(request_id.strip())
+
+    def values(self, name: str) -> List[str]:
+        """某个类别字段出现过的所有取值（按字母排序），用于下拉框"""
+        return sorted(self.labels[name].values(), key=str.lower)
+
+    @staticmethod
+    def parse_query(query: str) -> Tuple[str, Dict[str, str]]:
+        """
+        把 "melancholy sky emotion:melancholy arousal:high" 拆成自由文本和类别条件
+        类别名不认识的 "a:b" 按普通文本处理
+        """
+        words, filters = [], {}
+        for part in query.split():
+            name, sep, value = part.partition(':')
+            if sep and name.lower() in CATEGORY_FIELDS and value:
+                filters[name.lower()] = value
+            else:
+                words.append(part)
+        return ' '.join(words), filters
+
+    def search(self, text: str = '', **filters: Optional[str]) -> np.ndarray:
+        """
+        返回同时满足所有条件的条目下标（递增）：text 中的每个单词都出现在描述或画面属性中，
+        且每个给定的类别字段（emotion / valence / arousal，忽略大小写）取值相同；没有任何条件时返回全部条目
+
+        异常:
+            KeyError: 未知的类别字段名
+        """
+        postings = []
+        for name, value in filters.items():
+            if not value:
+                continue
+            postings.append(self.categories[name].get(value.strip().lower(), array('I')))
+        for word in set(self.tokenizer.tokenize(text)):
+            postings.append(self.words.get(word, array('I')))
+
+        if not postings:
+            return np.arange(self.count, dtype=np.uint32)
+
+        postings.sort(key=len)
+        result = np.frombuffer(postings[0], dtype=np.uint32) if postings[0] else np.zeros(0, dtype=np.uint32)
+        for posting in postings[1:]:
+            if not result.size:
+                break
+            other = np.frombuffer(posting, dtype=np.uint32) if posting else np.zeros(0, dtype=np.uint32)
+            found = np.searchsorted(other, result)
+            found[found == other.size] = 0
+            result = result[other[found] == result] if other.size else result[:0]
+        return result
@@ -0,0 +1,129 @@
+from collections import defaultdict
+from itertools import count
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from corpus_store import CorpusStore, gather_field, load_or_build_corpus_store
+from tokenizer import DEFAULT_TOKENIZER, Tokenizer
+
+
+def count_matrix_from_ids(token_ids: np.ndarray, lengths: np.ndarray, vocab_size: int) -> sparse.csr_matrix:
+    """
+    由拼接的词ID序列构建 文档×词 的稀疏计数矩阵
+
+    参数:
+        token_ids (np.ndarray): 所有文档的词ID依次拼接
+        lengths (np.ndarray): 每个文档的词数
+        vocab_size (int): 词表大小
+
+    返回:
+        scipy.sparse.csr_matrix: 形状 [文档数, vocab_size]，重复项已合并
+    """
+    lengths = np.asarray(lengths, dtype=np.int64)
+    rows = np.repeat(np.arange(len(lengths)), lengths)
+    data = np.ones(len(token_ids), dtype=np.int64)
+    matrix = sparse.csr_matrix((data, (rows, np.asarray(token_ids, dtype=np.int64))),
+                               shape=(len(lengths), vocab_size))
+    matrix.sum_duplicates()
+    return matrix
+
+
+def count_matrix_from_texts(texts: Sequence[str],
+                            tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> Tuple[sparse.csr_matrix, Dict[str, int]]:
+    """
+    对一组文本分词并构建稀疏计数矩阵
+
+    返回:
+        (计数矩阵, 词表 {单词: 列号})
+    """
+    vocabulary = defaultdict(count().__next__)
+    token_ids = []
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for k, text in enumerate(texts):
+        words = tokenizer.tokenize(text)
+        token_ids.extend(map(vocabulary.__getitem__, words))
+        lengths[k] = len(words)
+    matrix = count_matrix_from_ids(np.asarray(token_ids, dtype=np.int64), lengths, len(vocabulary))
+    return matrix, dict(vocabulary)
+
+
+def matrix_metrics(matrix: sparse.csr_matrix) -> Dict[str, np.ndarray]:
+    """
+    用向量化运算计算每个文档的词数、不同词数、TTR 和 Shannon 熵，以及合并语料的熵
+
+    TTR 与逐条调用 calculate_ttr 逐位一致；熵为相同公式的向量化求和，与逐条计算的差异在浮点舍入量级
+
+    返回:
+        dict: tokens, types, ttr, entropy（均为 [文档数] 数组）, corpus_entropy（标量）
+    """
+    tokens = np.asarray(matrix.sum(axis=1)).ravel().astype(np.int64)
+    types = np.diff(matrix.indptr).astype(np.int64)
+    nonempty = tokens > 0
+
+    ttr = np.zeros(len(tokens), dtype=np.float64)
+    ttr[nonempty] = types[nonempty] / tokens[nonempty]
+
+    # 每个非零计数对应的文档，概率 p = 计数 / 文档词数
+    rows = np.repeat(np.arange(len(tokens)), types)
+    probabilities = matrix.data / tokens[rows]
+    entropy = -np.bincount(rows, weights=probabilities * np.log2(probabilities), minlength=len(tokens))
+    entropy[~nonempty] = 0.0
+    entropy += 0.0  # 把 -0.0 规整为 0.0
+
+    pooled = np.asarray(matrix.sum(axis=0)).ravel()
+    pooled = pooled[pooled > 0]
+    if pooled.size:
+        pooled_probabilities = pooled / pooled.sum()
+        corpus_entropy = float(-(pooled_probabilities * np.log2(pooled_probabilities)).sum())
+    else:
+        corpus_entropy = 0.0
+
+    return {'tokens': tokens, 'types': types, 'ttr': ttr, 'entropy': entropy, 'corpus_entropy': corpus_entropy}
+
+
+def store_field_metrics(store: CorpusStore, field: str) -> Dict[str, np.ndarray]:
+    """
+    对语料存储中某个字段的全部文本构建计数矩阵并计算指标
+
+    返回:
+        dict: matrix_metrics 的结果，另含 entries（每行对应的条目下标）和 matrix
+    """
+    entries, lengths, token_ids = gather_field(store, field)
+    matrix = count_matrix_from_ids(token_ids, lengths, len(store.vocabulary))
+    return {'entries': entries, 'matrix': matrix, **matrix_metrics(matrix)}
+
+
+def process_json_matrix_metrics(json_file_path: str, store_dir: str,
+                                tokenizer: Tokenizer = DEFAULT_TOKENIZER) -> dict:
+    """
+    按字段整体计算平均 TTR、平均 Shannon 熵及合并语料熵；语料存储未变化时直接复用，无需重新分词
+
+    参数:
+        json_file_path (str): 标注文件路径
+        store_dir (str): 语料存储目录
+        tokenizer (Tokenizer): 分词器
+
+    返回:
+        dict: {字段: {ttr, entropy, corpus_entropy, documents}}
+    """
+    store = load_or_build_corpus_store(json_file_path, store_dir, tokenizer)
+    summary = {}
+    for field in store.fields:
+        metrics = store_field_metrics(store, field)
+        documents = len(metrics['entries'])
+        summary[field] = {
+            'ttr': float(metrics['ttr'].mean()) if documents else 0.0,
+            'entropy': float(metrics['entropy'].mean()) if documents else 0.0,
+            'corpus_entropy': metrics['corpus_entropy'],
+            'documents': documents,
+        }
+    return summary
+
+
+if __name__ == "__main__":
+    json_file_path = r'E:\Annotation\Abstract Art.json'  # Update to your actual JSON file path
+    for field, metrics in process_json_matrix_metrics(json_file_path, json_file_path + '.store').items():
+        print(f"{field}: 平均TTR {metrics['ttr']:.4f}, 平均熵 {metrics['entropy']:.4f} bits, "
+              f"合并语料熵 {metrics['corpus_entropy']:.4f} bits ({metrics['documents']} 条)")
@@ -0,0 +1,164 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from PIL import Image
+
+# 访问时间的写回间隔（秒）：浏览时不必每次命中都写数据库
+_TOUCH_INTERVAL = 60
+
+
+class ThumbnailCache:
+    """
+    跨会话的缩略图磁盘缓存
+    每张缩略图是一个小文件（RGB/灰度存JPEG，其余存PNG），SQLite索引记录 键 → (文件, 原图修改时间和大小, 访问时间)
+    键为 原图绝对路径 + 目标尺寸；原图的修改时间或大小变化时视为失效并重新生成
+    文件总大小超过 max_bytes 时按最近访问时间淘汰
+
+    参数:
+        cache_dir (str): 缓存目录
+        max_bytes (int): 缩略图文件总大小上限（字节）
+        quality (int): JPEG 质量
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 512 << 20, quality: int = 90):
+        self.directory = cache_dir
+        self.max_bytes = max_bytes
+        self.quality = quality
+        os.makedirs(cache_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(os.path.join(cache_dir, "index.sqlite"), check_same_thread=False)
+        self._db.executescript("""
+            CREATE TABLE IF NOT EXISTS thumbnails (key TEXT PRIMARY KEY, file TEXT, mtime_ns INTEGER,
+                                                   source_size INTEGER, bytes INTEGER, last_access REAL);
+            CREATE INDEX IF NOT EXISTS thumbnails_access ON thumbnails (last_access);
+        """)
+        self._db.commit()
+        self._total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def key(path: str, size: Tuple[int, int]) -> str:
+        return f"{os.path.abspath(path)}|{size[0]}x{size[1]}"
+
+    def _file_path(self, name: str) -> str:
+        return os.path.join(self.directory, name[:2], name)
+
+    def get(self, path: str, size: Tuple[int, int]) -> Optional[Image.Image]:
+        """
+        返回仍然有效的缓存缩略图，未命中时返回 None
+        异常:
+            FileNotFoundError: 原图不存在
+        """
+        stat = os.stat(path)
+        key = self.key(path, size)
+        try:
+            with self._lock:
+                row = self._db.execute("SELECT file, mtime_ns, source_size, last_access FROM thumbnails "
+                                       "WHERE key = ?", (key,)).fetchone()
+        except sqlite3.Error:
+            # 例如另一个查看器实例正在写入时数据库被锁定，按未命中处理
+            return None
+        if row is None or row[1] != stat.st_mtime_ns or row[2] != stat.st_size:
+            return None
+
+        try:
+            img = Image.open(self._file_path(row[0]))
+            img.load()
+        except OSError:
+            # 缓存文件丢失或损坏
+            self._remove(key)
+            return None
+
+        now = time.time()
+        if now - row[3] > _TOUCH_INTERVAL:
+            try:
+                with self._lock:
+                    self._db.execute("UPDATE thumbnails SET last_access = ? WHERE key = ?", (now, key))
+                    self._db.commit()
+            except sqlite3.Error:
+                pass
+        return img
+
+    def put(self, path: str, size: Tuple[int, int], image: Image.Image) -> None:
+        """写入（或替换）一张缩略图；写入失败时静默跳过"""
+        stat = os.stat(path)
+        key = self.key(path, size)
+        jpeg = image.mode in ("RGB", "L")
+        name = hashlib.sha1(key.encode("utf-8")).hexdigest() + (".jpg" if jpeg else ".png")
+        file_path = self._file_path(name)
+        tmp_path = f"{file_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(file_path), exist_ok=True)
+            if jpeg:
+                image.save(tmp_path, format="JPEG", quality=self.quality)
+            else:
+                image.save(tmp_path, format="PNG")
+            os.replace(tmp_path, file_path)
+            size_bytes = os.path.getsize(file_path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            try:
+                old = self._db.execute("SELECT bytes FROM thumbnails WHERE key = ?", (key,)).fetchone()
+                self._db.execute("INSERT OR REPLACE INTO thumbnails VALUES (?, ?, ?, ?, ?, ?)",
+                                 (key, name, stat.st_mtime_ns, stat.st_size, size_bytes, time.time()))
+                self._total += size_bytes - (old[0] if old else 0)
+                self._evict()
+                self._db.commit()
+            except sqlite3.Error:
+                # 淘汰时可能已删除部分文件，对应记录在下次 get 时按缓存文件丢失处理
+                try:
+                    self._db.rollback()
+                    self._total = self._db.execute("SELECT COALESCE(SUM(bytes), 0) FROM thumbnails").fetchone()[0]
+                except sqlite3.Error:
+                    pass
+
+    def _remove(self, key: str) -> None:
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT file, bytes FROM thumbnails WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return
+                self._db.execute("DELETE FROM thumbnails WHERE key = ?", (key,))
+                self._db.commit()
+            except sqlite3.Error:
+                return
+            self._total -= row[1]
+        try:
+            os.remove(self._file_path(row[0]))
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        """总大小超过上限时，按最近访问时间淘汰最旧的缩略图"""
+        while self._total > self.max_bytes:
+            rows = self._db.execute("SELECT key, file, bytes FROM thumbnails ORDER BY last_access LIMIT 64").fetchall()
+            if not rows:
+                self._total = 0
+                return
+            for key, name, size_bytes in rows:
+                if self._total <= self.max_bytes:
+                    return
+                self._db.execute("DELETE FROM thumbnails WHERE key = ?", (key,))
+                self._total -= size_bytes
+                try:
+                    os.remove(self._file_path(name))
+                except FileNotFoundError:
+                    pass
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM thumbnails").fetchone()[0]
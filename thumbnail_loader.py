@@ -0,0 +1,139 @@
+import itertools
+import os
+import queue
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Tuple
+
+from PIL import Image
+
+
+def make_thumbnail(path: str, size: Tuple[int, int]) -> Image.Image:
+    """
+    读取图像并缩放到 size 以内（保持宽高比），在工作线程中调用
+    JPEG 借助 draft() 直接按缩小的比例解码，大幅减少全尺寸解码的开销
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(path)
+    img = Image.open(path)
+    img.draft("RGB", size)
+    img.thumbnail(size)
+    img.load()
+    return img
+
+
+class ThumbnailLoader:
+    """
+    后台解码并缩放图像，带邻近预取和已完成缩略图的LRU缓存
+
+    load() 请求当前图像并预取相邻图像：每次调用开启新的一代请求，尚未开始的旧请求直接丢弃；
+    当前图像优先解码，相邻图像按距离依次解码。完成的结果（PIL图像，或失败时的异常）
+    通过 poll() 在调用方线程（Tk主线程）中取回，ImageTk.PhotoImage 只应在该线程中创建
+
+    参数:
+        num_workers (int): 解码线程数
+        cache_size (int): 内存中缓存的缩略图数量
+        disk_cache (ThumbnailCache): 可选的跨会话磁盘缓存，命中时不再读取原图
+    """
+
+    def __init__(self, num_workers: int = 2, cache_size: int = 64, disk_cache=None):
+        self.cache_size = cache_size
+        self.disk_cache = disk_cache
+        self._cache = OrderedDict()   # (路径, 尺寸) → PIL图像或异常
+        self._queued = {}             # 已排队的键 → 最近一次排队的代数
+        self._running = set()         # 正在解码的键
+        self._lock = threading.Lock()
+        self._tasks = queue.PriorityQueue()
+        self._done = queue.Queue()
+        self._generation = 0
+        self._sequence = itertools.count()
+        self._closed = False
+        self._workers = [threading.Thread(target=self._work, daemon=True) for _ in range(num_workers)]
+        for worker in self._workers:
+            worker.start()
+
+    def get(self, path: str, size: Tuple[int, int]):
+        """返回已缓存的结果，没有时返回 None"""
+        with self._lock:
+            result = self._cache.get((path, size))
+            if result is not None:
+                self._cache.move_to_end((path, size))
+            return result
+
+    def load(self, path: str, size: Tuple[int, int], neighbours: Iterable[str] = ()):
+        """
+        请求 path 的缩略图，并按给定顺序（由近及远）预取 neighbours
+
+        返回:
+            已缓存时直接返回结果（PIL图像或异常），否则返回 None，结果稍后由 poll() 取回
+        """
+        with self._lock:
+            self._generation += 1
+            generation = self._generation
+        result = self.get(path, size)
+        if result is None:
+            self._submit(0, generation, path, size)
+        for distance, neighbour in enumerate(neighbours, 1):
+            if neighbour and self.get(neighbour, size) is None:
+                self._submit(distance, generation, neighbour, size)
+        return result
+
+    def _submit(self, priority: int, generation: int, path: str, size: Tuple[int, int]) -> None:
+        key = (path, size)
+        with self._lock:
+            if key in self._running or self._queued.get(key) == generation:
+                return
+            self._queued[key] = generation
+        self._tasks.put((priority, next(self._sequence), generation, path, size))
+
+    def _work(self) -> None:
+        while True:
+            _, _, generation, path, size = self._tasks.get()
+            if self._closed:
+                return
+            key = (path, size)
+            with self._lock:
+                if self._queued.get(key) == generation:
+                    del self._queued[key]
+                # 用户已经翻到别处，放弃尚未开始的旧请求；同一图像已在解码或缓存中时也跳过
+                if generation != self._generation or key in self._running or key in self._cache:
+                    continue
+                self._running.add(key)
+            try:
+                result = self._thumbnail(path, size)
+            except Exception as e:
+                result = e
+            with self._lock:
+                self._running.discard(key)
+                self._cache[key] = result
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+            self._done.put((path, size, result))
+
+    def _thumbnail(self, path: str, size: Tuple[int, int]) -> Image.Image:
+        if self.disk_cache is None:
+            return make_thumbnail(path, size)
+        img = self.disk_cache.get(path, size)
+        if img is None:
+            img = make_thumbnail(path, size)
+            self.disk_cache.put(path, size, img)
+        return img
+
+    def poll(self) -> List[Tuple[str, Tuple[int, int], object]]:
+        """取回自上次调用以来完成的 (路径, 尺寸, 结果)"""
+        completed = []
+        while True:
+            try:
+                completed.append(self._done.get_nowait())
+            except queue.Empty:
+                return completed
+
+    def busy(self) -> bool:
+        with self._lock:
+            return bool(self._queued or self._running)
+
+    def close(self) -> None:
+        self._closed = True
+        for _ in self._workers:
+            self._tasks.put((-1, next(self._sequence), 0, None, None))